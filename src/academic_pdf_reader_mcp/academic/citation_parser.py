@@ -1,39 +1,62 @@
 """
 Citation and reference parsing for academic papers
 """
+import asyncio
 import re
+from collections import Counter
 from typing import List, Dict, Any, Optional
 from ..core.pdf_processor import PDFProcessor
+from ..core.cache import cached_by_mtime
+
+# Reference list line prefixes that start a new entry: "[1] ...", "1. ...", "Smith, ..."
+NEW_REFERENCE_RE = re.compile(r'^(?:\[\d+\]|\d+\.|[A-Z][a-z]+,)')
+
+# Reference year, DOI and URL found in one scan. Each alternative is a
+# lookahead so a field nested in another (a year inside a URL) still matches.
+REFERENCE_FIELDS_RE = re.compile(
+    r'(?=\((?P<year>\d{4}[a-z]?)\))'
+    r'|(?=(?i:doi)[:\s]*(?P<doi>10\.\d+/[^\s]+))'
+    r'|(?=(?P<url>https?://[^\s]+))'
+)
+
+# Leading reference numbers: "[1] " and/or "1. "
+LEADING_NUMBER_RE = re.compile(r'^(?:\[\d+\]\s*)?(?:\d+\.\s*)?')
 
 class CitationParser:
     """Parses citations and references from academic papers"""
     
-    # Citation patterns
+    # Citation patterns, tagged with the citation type they detect
     IN_TEXT_PATTERNS = [
-        r'\(([A-Z][a-z]+ et al\.?, \d{4}[a-z]?)\)',  # (Smith et al., 2020)
-        r'\(([A-Z][a-z]+ & [A-Z][a-z]+, \d{4}[a-z]?)\)',  # (Smith & Jones, 2020)
-        r'\(([A-Z][a-z]+, \d{4}[a-z]?)\)',  # (Smith, 2020)
-        r'\[(\d+)\]',  # [1]
-        r'\[(\d+)-(\d+)\]',  # [1-3]
-        r'\[(\d+,\s*\d+(?:,\s*\d+)*)\]',  # [1, 2, 3]
+        (re.compile(r'\(([A-Z][a-z]+ et al\.?, \d{4}[a-z]?)\)'), "author_year"),  # (Smith et al., 2020)
+        (re.compile(r'\(([A-Z][a-z]+ & [A-Z][a-z]+, \d{4}[a-z]?)\)'), "author_year"),  # (Smith & Jones, 2020)
+        (re.compile(r'\(([A-Z][a-z]+, \d{4}[a-z]?)\)'), "author_year"),  # (Smith, 2020)
+        (re.compile(r'\[(\d+)\]'), "numbered"),  # [1]
+        (re.compile(r'\[(\d+)-(\d+)\]'), "other"),  # [1-3]
+        (re.compile(r'\[(\d+,\s*\d+(?:,\s*\d+)*)\]'), "other"),  # [1, 2, 3]
     ]
     
+    # All in-text patterns fused into one alternation so the text is scanned
+    # once; the named group that matched (p0, p1, ...) identifies the pattern
+    IN_TEXT_RE = re.compile('|'.join(f'(?P<p{i}>{p.pattern})' for i, (p, _) in enumerate(IN_TEXT_PATTERNS)))
+    IN_TEXT_GROUP_TYPES = {f'p{i}': t for i, (_, t) in enumerate(IN_TEXT_PATTERNS)}
+    
     # Reference patterns
     REFERENCE_PATTERNS = [
         # Author, A. (Year). Title. Journal, Volume(Issue), pages.
-        r'^([A-Z][a-z]+(?:,\s[A-Z]\.)*(?:\s&\s[A-Z][a-z]+(?:,\s[A-Z]\.)*)*)\.\s*\((\d{4}[a-z]?)\)\.\s*(.+?)\.\s*([^,]+),\s*(\d+)(?:\((\d+)\))?,\s*(\d+-\d+)\.',
+        re.compile(r'^([A-Z][a-z]+(?:,\s[A-Z]\.)*(?:\s&\s[A-Z][a-z]+(?:,\s[A-Z]\.)*)*)\.\s*\((\d{4}[a-z]?)\)\.\s*(.+?)\.\s*([^,]+),\s*(\d+)(?:\((\d+)\))?,\s*(\d+-\d+)\.'),
         # Author, A., & Author, B. (Year). Title. Journal, Volume, pages.
-        r'^([A-Z][a-z]+(?:,\s[A-Z]\.)*(?:\s&\s[A-Z][a-z]+(?:,\s[A-Z]\.)*)*)\.\s*\((\d{4}[a-z]?)\)\.\s*(.+?)\.\s*([^,]+),\s*(\d+),\s*(\d+-\d+)\.',
+        re.compile(r'^([A-Z][a-z]+(?:,\s[A-Z]\.)*(?:\s&\s[A-Z][a-z]+(?:,\s[A-Z]\.)*)*)\.\s*\((\d{4}[a-z]?)\)\.\s*(.+?)\.\s*([^,]+),\s*(\d+),\s*(\d+-\d+)\.'),
         # Numbered references: [1] Author, A. (Year). Title...
-        r'^\[(\d+)\]\s+([A-Z][a-z]+(?:,\s[A-Z]\.)*(?:(?:,\s)?\s?&\s[A-Z][a-z]+(?:,\s[A-Z]\.)*)*)\.\s*\((\d{4}[a-z]?)\)\.\s*(.+)',
+        re.compile(r'^\[(\d+)\]\s+([A-Z][a-z]+(?:,\s[A-Z]\.)*(?:(?:,\s)?\s?&\s[A-Z][a-z]+(?:,\s[A-Z]\.)*)*)\.\s*\((\d{4}[a-z]?)\)\.\s*(.+)'),
     ]
     
     @staticmethod
+    @cached_by_mtime
     async def extract_citations(pdf_path: str) -> Dict[str, Any]:
         """Extract all citations from the PDF"""
         text = await PDFProcessor.extract_raw_text(pdf_path)
         
-        in_text_citations = CitationParser._find_in_text_citations(text)
+        in_text_citations = await asyncio.to_thread(CitationParser._find_in_text_citations, text)
         references = await CitationParser._extract_references(pdf_path)
         
         return {
@@ -47,35 +70,25 @@ class CitationParser:
     @staticmethod
     def _find_in_text_citations(text: str) -> List[Dict[str, Any]]:
         """Find in-text citations"""
-        citations = []
-        
-        for pattern in CitationParser.IN_TEXT_PATTERNS:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                citation_text = match.group(0)
-                position = match.start()
-                
-                # Get context (50 chars before and after)
-                context_start = max(0, position - 50)
-                context_end = min(len(text), position + len(citation_text) + 50)
-                context = text[context_start:context_end]
-                
-                citations.append({
-                    "citation": citation_text,
-                    "position": position,
-                    "context": context,
-                    "type": CitationParser._classify_citation_type(citation_text)
-                })
-        
-        # Remove duplicates and sort by position
-        unique_citations = []
-        seen = set()
-        for citation in sorted(citations, key=lambda x: x["position"]):
-            if citation["citation"] not in seen:
-                unique_citations.append(citation)
-                seen.add(citation["citation"])
-        
-        return unique_citations
+        # First match of each citation, keyed by its text. A single finditer
+        # pass yields matches in position order, so later hits are duplicates
+        # and the dict stays sorted by position.
+        first_matches = {}
+        for match in CitationParser.IN_TEXT_RE.finditer(text):
+            first_matches.setdefault(match.group(0), match)
+        
+        # Build results (and context slices) only for the unique citations
+        group_types = CitationParser.IN_TEXT_GROUP_TYPES
+        return [
+            {
+                "citation": citation_text,
+                "position": match.start(),
+                # Context: 50 chars before and after
+                "context": text[max(0, match.start() - 50):match.end() + 50],
+                "type": group_types[match.lastgroup]
+            }
+            for citation_text, match in first_matches.items()
+        ]
     
     @staticmethod
     async def _extract_references(pdf_path: str) -> List[Dict[str, Any]]:
@@ -93,30 +106,28 @@ class CitationParser:
         # Split by lines and clean
         lines = [line.strip() for line in ref_text.split('\n') if line.strip()]
         
-        current_ref = ""
+        current_ref_parts: List[str] = []
         ref_number = 1
         
         for line in lines:
             # Check if line starts a new reference
-            if (re.match(r'^\[\d+\]', line) or 
-                re.match(r'^\d+\.', line) or
-                re.match(r'^[A-Z][a-z]+,', line)):
+            if NEW_REFERENCE_RE.match(line):
                 
                 # Save previous reference
-                if current_ref:
-                    parsed_ref = CitationParser._parse_reference(current_ref, ref_number - 1)
+                if current_ref_parts:
+                    parsed_ref = CitationParser._parse_reference(' '.join(current_ref_parts), ref_number - 1)
                     if parsed_ref:
                         references.append(parsed_ref)
                 
-                current_ref = line
+                current_ref_parts = [line]
                 ref_number += 1
             else:
                 # Continue previous reference
-                current_ref += " " + line
+                current_ref_parts.append(line)
         
         # Save last reference
-        if current_ref:
-            parsed_ref = CitationParser._parse_reference(current_ref, ref_number - 1)
+        if current_ref_parts:
+            parsed_ref = CitationParser._parse_reference(' '.join(current_ref_parts), ref_number - 1)
             if parsed_ref:
                 references.append(parsed_ref)
         
@@ -142,52 +153,44 @@ class CitationParser:
             "pages": ""
         }
         
-        # Extract year
-        year_match = re.search(r'\((\d{4}[a-z]?)\)', ref_text)
+        # First occurrence of each of year, DOI and URL
+        fields = {}
+        for match in REFERENCE_FIELDS_RE.finditer(ref_text):
+            fields.setdefault(match.lastgroup, match)
+            if len(fields) == 3:
+                break
+        
+        year_match = fields.get("year")
         if year_match:
-            parsed["year"] = year_match.group(1)
+            parsed["year"] = year_match.group("year")
         
-        # Extract DOI
-        doi_match = re.search(r'doi[:\s]*(10\.\d+/[^\s]+)', ref_text, re.IGNORECASE)
-        if doi_match:
-            parsed["doi"] = doi_match.group(1)
+        if "doi" in fields:
+            parsed["doi"] = fields["doi"].group("doi")
         
-        # Extract URL
-        url_match = re.search(r'https?://[^\s]+', ref_text)
-        if url_match:
-            parsed["url"] = url_match.group(0)
+        if "url" in fields:
+            parsed["url"] = fields["url"].group("url")
         
         # Simple author extraction (first part before year)
         if year_match:
             author_part = ref_text[:year_match.start()].strip()
             # Remove reference numbers
-            author_part = re.sub(r'^\[\d+\]\s*', '', author_part)
-            author_part = re.sub(r'^\d+\.\s*', '', author_part)
-            parsed["authors_raw"] = author_part
+            parsed["authors_raw"] = LEADING_NUMBER_RE.sub('', author_part, count=1)
         
         return parsed
     
-    @staticmethod
-    def _classify_citation_type(citation: str) -> str:
-        """Classify the type of citation"""
-        if re.match(r'\[\d+\]', citation):
-            return "numbered"
-        elif re.match(r'\([A-Z]', citation):
-            return "author_year"
-        else:
-            return "other"
-    
     @staticmethod
     def _detect_citation_style(citations: List[Dict[str, Any]]) -> str:
         """Detect the predominant citation style"""
         if not citations:
             return "unknown"
         
-        types = [c["type"] for c in citations]
+        type_counts = Counter(c["type"] for c in citations)
+        numbered = type_counts["numbered"]
+        author_year = type_counts["author_year"]
         
-        if types.count("numbered") > types.count("author_year"):
+        if numbered > author_year:
             return "numbered" 
-        elif types.count("author_year") > types.count("numbered"):
+        elif author_year > numbered:
             return "apa_harvard"
         else:
             return "mixed"
@@ -209,21 +212,32 @@ class CitationParser:
     @staticmethod
     def _extract_reference_years(references: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Extract publication years from references"""
-        years = []
+        # Single pass tracking min, max and recent count; no list of years
+        min_year = max_year = None
+        recent = 0
         for ref in references:
-            if ref["year"]:
-                try:
-                    year = int(ref["year"][:4])  # Remove letter suffixes
-                    years.append(year)
-                except ValueError:
-                    continue
-        
-        if not years:
+            year_text = ref["year"]
+            if not year_text:
+                continue
+            try:
+                year = int(year_text[:4])  # Remove letter suffixes
+            except ValueError:
+                continue
+            if min_year is None:
+                min_year = max_year = year
+            elif year < min_year:
+                min_year = year
+            elif year > max_year:
+                max_year = year
+            if year >= 2015:
+                recent += 1
+        
+        if min_year is None:
             return {"min_year": None, "max_year": None, "year_range": 0}
         
         return {
-            "min_year": min(years),
-            "max_year": max(years),
-            "year_range": max(years) - min(years),
-            "recent_references": sum(1 for y in years if y >= 2015)
-        }
\ No newline at end of file
+            "min_year": min_year,
+            "max_year": max_year,
+            "year_range": max_year - min_year,
+            "recent_references": recent
+        }
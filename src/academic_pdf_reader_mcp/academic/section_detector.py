@@ -1,83 +1,87 @@
 """
 Academic section detection for research papers
 """
+import asyncio
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence
 from ..core.pdf_processor import PDFProcessor
+from ..core.cache import cached_by_mtime
 
 class SectionDetector:
     """Detects and extracts academic paper sections"""
     
-    # Common academic section patterns
+    # Numbered section headers ("2. Methods and Data"), matched as prefixes.
+    # Unnumbered headers are whole-line literals, listed in HEADER_SECTIONS.
     SECTION_PATTERNS = {
         "abstract": [
-            r"^ABSTRACT\s*$",
-            r"^Abstract\s*$", 
-            r"^\d+\.\s*ABSTRACT",
-            r"^\d+\.\s*Abstract"
+            re.compile(r"^\d+\.\s*Abstract", re.IGNORECASE)
         ],
         "introduction": [
-            r"^INTRODUCTION\s*$",
-            r"^Introduction\s*$",
-            r"^\d+\.\s*INTRODUCTION",
-            r"^\d+\.\s*Introduction",
-            r"^1\.\s*Introduction"
+            re.compile(r"^\d+\.\s*Introduction", re.IGNORECASE)
         ],
         "methods": [
-            r"^METHODS?\s*$",
-            r"^Methods?\s*$",
-            r"^METHODOLOGY\s*$",
-            r"^Methodology\s*$",
-            r"^\d+\.\s*METHODS?",
-            r"^\d+\.\s*Methods?",
-            r"^\d+\.\s*METHODOLOGY",
-            r"^\d+\.\s*Methodology"
+            re.compile(r"^\d+\.\s*Methods?", re.IGNORECASE),
+            re.compile(r"^\d+\.\s*Methodology", re.IGNORECASE)
         ],
         "results": [
-            r"^RESULTS?\s*$",
-            r"^Results?\s*$",
-            r"^FINDINGS\s*$",
-            r"^Findings\s*$",
-            r"^\d+\.\s*RESULTS?",
-            r"^\d+\.\s*Results?",
-            r"^\d+\.\s*FINDINGS",
-            r"^\d+\.\s*Findings"
+            re.compile(r"^\d+\.\s*Results?", re.IGNORECASE),
+            re.compile(r"^\d+\.\s*Findings", re.IGNORECASE)
         ],
         "discussion": [
-            r"^DISCUSSION\s*$",
-            r"^Discussion\s*$",
-            r"^\d+\.\s*DISCUSSION",
-            r"^\d+\.\s*Discussion"
+            re.compile(r"^\d+\.\s*Discussion", re.IGNORECASE)
         ],
         "conclusion": [
-            r"^CONCLUSION\s*$",
-            r"^Conclusion\s*$",
-            r"^CONCLUSIONS\s*$",
-            r"^Conclusions\s*$",
-            r"^\d+\.\s*CONCLUSION",
-            r"^\d+\.\s*Conclusion",
-            r"^\d+\.\s*CONCLUSIONS",
-            r"^\d+\.\s*Conclusions"
+            re.compile(r"^\d+\.\s*Conclusions?", re.IGNORECASE)
         ],
         "references": [
-            r"^REFERENCES\s*$",
-            r"^References\s*$",
-            r"^BIBLIOGRAPHY\s*$",
-            r"^Bibliography\s*$",
-            r"^\d+\.\s*REFERENCES",
-            r"^\d+\.\s*References"
+            re.compile(r"^\d+\.\s*References", re.IGNORECASE)
         ]
     }
     
+    # All section patterns fused into one anchored alternation; the named
+    # group that matched (``lastgroup``) is the section name
+    SECTION_RE = re.compile(
+        '|'.join(
+            f"(?P<{name}>{'|'.join(p.pattern.lstrip('^') for p in patterns)})"
+            for name, patterns in SECTION_PATTERNS.items()
+        ),
+        re.IGNORECASE
+    )
+    
+    # Unnumbered headers, keyed by the lowercased line
+    HEADER_SECTIONS = {
+        "abstract": "abstract",
+        "introduction": "introduction",
+        "method": "methods",
+        "methods": "methods",
+        "methodology": "methods",
+        "result": "results",
+        "results": "results",
+        "findings": "results",
+        "discussion": "discussion",
+        "conclusion": "conclusion",
+        "conclusions": "conclusion",
+        "references": "references",
+        "bibliography": "references"
+    }
+    
+    # Longest line still looked up as an unnumbered section header
+    MAX_HEADER_LENGTH = 40
+    
     @staticmethod
+    @cached_by_mtime
     async def detect_sections(pdf_path: str) -> Dict[str, Any]:
         """Detect academic sections in the PDF"""
-        text = await PDFProcessor.extract_raw_text(pdf_path)
-        lines = text.split('\n')
-        
+        lines = await PDFProcessor.extract_raw_lines(pdf_path)
+        return await asyncio.to_thread(SectionDetector._parse_sections, lines)
+    
+    @staticmethod
+    def _parse_sections(lines: Sequence[str]) -> Dict[str, Any]:
+        """Split document lines into sections at detected headers"""
         sections = {}
         current_section = None
         section_content = []
+        section_words = 0
         
         for i, line in enumerate(lines):
             line = line.strip()
@@ -94,16 +98,18 @@ class SectionDetector:
                         "content": '\n'.join(section_content).strip(),
                         "line_start": i - len(section_content),
                         "line_end": i - 1,
-                        "word_count": len(' '.join(section_content).split())
+                        "word_count": section_words
                     }
                 
                 # Start new section
                 current_section = detected_section
                 section_content = []
+                section_words = 0
             else:
                 # Add to current section
                 if current_section:
                     section_content.append(line)
+                    section_words += len(line.split())
         
         # Save last section
         if current_section and section_content:
@@ -111,7 +117,7 @@ class SectionDetector:
                 "content": '\n'.join(section_content).strip(),
                 "line_start": len(lines) - len(section_content),
                 "line_end": len(lines) - 1,
-                "word_count": len(' '.join(section_content).split())
+                "word_count": section_words
             }
         
         return {
@@ -123,11 +129,17 @@ class SectionDetector:
     @staticmethod
     def _match_section_pattern(line: str) -> Optional[str]:
         """Check if line matches any section pattern"""
-        for section_name, patterns in SectionDetector.SECTION_PATTERNS.items():
-            for pattern in patterns:
-                if re.match(pattern, line, re.IGNORECASE):
-                    return section_name
-        return None
+        if not line:
+            return None
+        if line[0].isdigit():
+            match = SectionDetector.SECTION_RE.match(line)
+            return match.lastgroup if match else None
+        # Unnumbered headers are a single title word, so longer lines are
+        # body text and skip the lookup
+        if len(line) > SectionDetector.MAX_HEADER_LENGTH:
+            return None
+        
+        return SectionDetector.HEADER_SECTIONS.get(line.rstrip().lower())
     
     @staticmethod
     async def extract_abstract(pdf_path: str) -> Dict[str, Any]:
@@ -144,7 +156,7 @@ class SectionDetector:
         
         # Fallback: look for abstract in first few paragraphs
         text = await PDFProcessor.extract_raw_text(pdf_path)
-        paragraphs = text.split('\n\n')[:5]  # First 5 paragraphs
+        paragraphs = text.split('\n\n', 5)[:5]  # First 5 paragraphs
         
         for para in paragraphs:
             if len(para.split()) > 50 and len(para.split()) < 300:  # Abstract length
@@ -200,10 +212,11 @@ class SectionDetector:
         
         # Calculate section word counts
         section_stats = {}
+        total_words = sum(s["word_count"] for s in sections.values())
         for section_name, section_data in sections.items():
             section_stats[section_name] = {
                 "word_count": section_data["word_count"],
-                "percentage": round(section_data["word_count"] / sum(s["word_count"] for s in sections.values()) * 100, 1)
+                "percentage": round(section_data["word_count"] / total_words * 100, 1)
             }
         
         summary["section_statistics"] = section_stats
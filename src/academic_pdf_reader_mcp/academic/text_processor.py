@@ -1,8 +1,10 @@
 """
 Academic text processing for proper reading order and formatting
 """
+import asyncio
+import os
 import re
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Tuple
 from ..core.pdf_processor import PDFProcessor
 
 class AcademicTextProcessor:
@@ -10,33 +12,48 @@ class AcademicTextProcessor:
     
     # Math formula patterns
     MATH_PATTERNS = [
-        r'\$[^$]+\$',  # LaTeX inline math
-        r'\$\$[^$]+\$\$',  # LaTeX display math
-        r'\\begin\{equation\}.*?\\end\{equation\}',  # LaTeX equations
-        r'\\begin\{align\}.*?\\end\{align\}',  # LaTeX align
-        r'[∑∏∫∮∆∇α-ωΑ-Ω≤≥≠±∞]',  # Math symbols
+        re.compile(r'\$[^$]+\$', re.DOTALL),  # LaTeX inline math
+        re.compile(r'\$\$[^$]+\$\$', re.DOTALL),  # LaTeX display math
+        re.compile(r'\\begin\{equation\}.*?\\end\{equation\}', re.DOTALL),  # LaTeX equations
+        re.compile(r'\\begin\{align\}.*?\\end\{align\}', re.DOTALL),  # LaTeX align
     ]
     
+    # Single-codepoint math symbols
+    MATH_SYMBOL_PATTERN = re.compile(r'[∑∏∫∮∆∇α-ωΑ-Ω≤≥≠±∞]')
+    
+    # Text cleanup fixes, tried in order at each position
+    CLEAN_PATTERN = re.compile(
+        r'(?<=[a-z])(?=[A-Z])'  # Missing space between words
+        r'|(\w)-\s+(\w)'  # Hyphenated words
+        r'|\s+([.,;:])'  # Punctuation spacing
+        r'|\s+'  # Excessive whitespace
+    )
+    
+    # Sentence terminator and the whitespace after it
+    SENTENCE_END_PATTERN = re.compile(r'[.!?]\s+')
+    
     @staticmethod
     async def extract_academic_text(pdf_path: str, page_num: int = None) -> Dict[str, Any]:
         """Extract text with proper academic reading order"""
         if page_num is not None:
             return await AcademicTextProcessor._process_single_page(pdf_path, page_num)
         
-        # Process all pages
-        doc = await PDFProcessor.get_pdf_document(pdf_path)
-        all_text = ""
-        page_texts = []
+        # Process all pages concurrently, bounded by the number of cores. Only
+        # the page count is kept: the document may be closed and reopened
+        # (evicted, or changed on disk) while the pages are processed.
+        page_count = len(await PDFProcessor.get_pdf_document(pdf_path))
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        
+        async def process_page(page_idx: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await AcademicTextProcessor._process_single_page(pdf_path, page_idx)
         
-        for page_idx in range(len(doc)):
-            page_result = await AcademicTextProcessor._process_single_page(pdf_path, page_idx)
-            page_texts.append(page_result)
-            all_text += page_result["processed_text"] + "\n\n"
+        page_texts = await asyncio.gather(*(process_page(i) for i in range(page_count)))
         
         return {
-            "full_text": all_text.strip(),
+            "full_text": "\n\n".join(p["processed_text"] for p in page_texts).strip(),
             "pages": page_texts,
-            "total_pages": len(doc)
+            "total_pages": len(page_texts)
         }
     
     @staticmethod
@@ -44,11 +61,26 @@ class AcademicTextProcessor:
         """Process a single page for academic reading order"""
         blocks = await PDFProcessor.get_page_blocks(pdf_path, page_num)
         
+        # Regex cleanup is CPU-bound; keep it off the event loop
+        processed_text, math_formulas = await asyncio.to_thread(
+            AcademicTextProcessor._process_blocks, blocks
+        )
+        
+        return {
+            "processed_text": processed_text,
+            "math_formulas": math_formulas,
+            "page_number": page_num,
+            "block_count": len(blocks)
+        }
+    
+    @staticmethod
+    def _process_blocks(blocks: List[Dict[str, Any]]) -> Tuple[str, List[str]]:
+        """Order, clean and extract math from a page's text blocks"""
         # Sort blocks by reading order (top-to-bottom, left-to-right for columns)
         sorted_blocks = AcademicTextProcessor._sort_blocks_reading_order(blocks)
         
         # Combine text and preserve formatting
-        processed_text = ""
+        processed_parts = []
         math_formulas = []
         
         for block in sorted_blocks:
@@ -60,14 +92,9 @@ class AcademicTextProcessor:
             
             # Clean and format text
             cleaned_text = AcademicTextProcessor._clean_academic_text(text)
-            processed_text += cleaned_text + "\n\n"
+            processed_parts.append(cleaned_text)
         
-        return {
-            "processed_text": processed_text.strip(),
-            "math_formulas": math_formulas,
-            "page_number": page_num,
-            "block_count": len(blocks)
-        }
+        return "\n\n".join(processed_parts).strip(), math_formulas
     
     @staticmethod
     def _sort_blocks_reading_order(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -76,38 +103,27 @@ class AcademicTextProcessor:
             return blocks
         
         # Detect if we have columns by analyzing x-positions
-        x_positions = [block["bbox"][0] for block in blocks]
-        page_width = max([block["bbox"][2] for block in blocks])
+        page_width = max(block["bbox"][2] for block in blocks)
         
         # Simple column detection: if we have blocks starting in different thirds
         left_third = page_width / 3
         right_third = 2 * page_width / 3
         
-        left_blocks = [b for b in blocks if b["bbox"][0] < left_third]
-        right_blocks = [b for b in blocks if b["bbox"][0] > right_third]
-        
-        if len(left_blocks) > 0 and len(right_blocks) > 0:
-            # Two-column layout
-            left_sorted = sorted(left_blocks, key=lambda x: x["bbox"][1])  # Sort by y
-            right_sorted = sorted(right_blocks, key=lambda x: x["bbox"][1])  # Sort by y
-            
-            # Interleave columns based on y-position
-            result = []
-            left_idx = right_idx = 0
-            
-            while left_idx < len(left_sorted) and right_idx < len(right_sorted):
-                if left_sorted[left_idx]["bbox"][1] < right_sorted[right_idx]["bbox"][1]:
-                    result.append(left_sorted[left_idx])
-                    left_idx += 1
-                else:
-                    result.append(right_sorted[right_idx])
-                    right_idx += 1
-            
-            # Add remaining blocks
-            result.extend(left_sorted[left_idx:])
-            result.extend(right_sorted[right_idx:])
-            
-            return result
+        # Partition in a single pass over the blocks
+        left_blocks = []
+        right_blocks = []
+        for block in blocks:
+            x0 = block["bbox"][0]
+            if x0 < left_third:
+                left_blocks.append(block)
+            elif x0 > right_third:
+                right_blocks.append(block)
+        
+        if left_blocks and right_blocks:
+            # Two-column layout: interleave columns based on y-position.
+            # A stable sort with the right column first is the same as
+            # merging both y-sorted columns with ties going to the right one.
+            return sorted(right_blocks + left_blocks, key=lambda x: x["bbox"][1])
         else:
             # Single column or complex layout - sort by y-position
             return sorted(blocks, key=lambda x: x["bbox"][1])
@@ -119,37 +135,59 @@ class AcademicTextProcessor:
         processed_text = text
         
         for pattern in AcademicTextProcessor.MATH_PATTERNS:
-            matches = re.findall(pattern, text, re.DOTALL)
+            matches = pattern.findall(text)
             for match in matches:
                 formulas.append(match)
                 # Replace with placeholder
                 processed_text = processed_text.replace(match, f"[MATH_FORMULA_{len(formulas)}]")
         
+        # Every symbol occurrence is recorded, and each distinct symbol is
+        # replaced by the placeholder of its first occurrence in one pass
+        symbols = AcademicTextProcessor.MATH_SYMBOL_PATTERN.findall(text)
+        if symbols:
+            placeholders = {}
+            for symbol in symbols:
+                formulas.append(symbol)
+                placeholders.setdefault(ord(symbol), f"[MATH_FORMULA_{len(formulas)}]")
+            processed_text = processed_text.translate(placeholders)
+        
         return processed_text, formulas
     
     @staticmethod
     def _clean_academic_text(text: str) -> str:
         """Clean and format academic text"""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Fix common PDF extraction issues
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)  # Fix missing spaces
-        text = re.sub(r'(\w)-\s+(\w)', r'\1\2', text)  # Fix hyphenated words
-        text = re.sub(r'\s+([.,;:])', r'\1', text)  # Fix punctuation spacing
-        
-        # Preserve paragraph breaks
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        
+        # One pass collapses whitespace and fixes common PDF extraction issues
+        text = AcademicTextProcessor.CLEAN_PATTERN.sub(AcademicTextProcessor._clean_replacement, text)
         return text.strip()
     
+    @staticmethod
+    def _clean_replacement(match: re.Match) -> str:
+        """Replacement for each CLEAN_PATTERN alternative"""
+        if match.group(1) is not None:  # Hyphenated word
+            return match.group(1) + match.group(2)
+        if match.group(3) is not None:  # Space before punctuation
+            return match.group(3)
+        return ' '  # Missing space or whitespace run
+    
+    @staticmethod
+    def _iter_sentences(text: str) -> Iterator[str]:
+        """Yield sentences split on whitespace following '.', '!' or '?'"""
+        start = 0
+        for match in AcademicTextProcessor.SENTENCE_END_PATTERN.finditer(text):
+            yield text[start:match.start() + 1]
+            start = match.end()
+        yield text[start:]
+    
     @staticmethod
     async def chunk_academic_content(pdf_path: str, chunk_size: int = 1000) -> List[Dict[str, Any]]:
         """Break academic content into agent-friendly chunks"""
         text_data = await AcademicTextProcessor.extract_academic_text(pdf_path)
         
         chunks = []
-        current_chunk = ""
+        # The chunk text is ' '.join(current_chunk_parts); the leading empty
+        # part mirrors the separator before the very first sentence
+        current_chunk_parts: List[str] = [""]
+        current_chunk_len = 0
         current_page = 0
         
         for page_data in text_data["pages"]:
@@ -157,31 +195,33 @@ class AcademicTextProcessor:
             page_num = page_data["page_number"]
             
             # Split by sentences for better chunking
-            sentences = re.split(r'(?<=[.!?])\s+', page_text)
-            
-            for sentence in sentences:
-                if len(current_chunk) + len(sentence) > chunk_size:
-                    if current_chunk:
+            for sentence in AcademicTextProcessor._iter_sentences(page_text):
+                if current_chunk_len + len(sentence) > chunk_size:
+                    if current_chunk_len:
+                        chunk_text = ' '.join(current_chunk_parts).strip()
                         chunks.append({
                             "chunk_id": len(chunks),
-                            "text": current_chunk.strip(),
+                            "text": chunk_text,
                             "page_start": current_page,
                             "page_end": page_num,
-                            "word_count": len(current_chunk.split())
+                            "word_count": len(chunk_text.split())
                         })
-                    current_chunk = sentence
+                    current_chunk_parts = [sentence]
+                    current_chunk_len = len(sentence)
                     current_page = page_num
                 else:
-                    current_chunk += " " + sentence
+                    current_chunk_parts.append(sentence)
+                    current_chunk_len += 1 + len(sentence)
         
         # Add final chunk
-        if current_chunk:
+        if current_chunk_len:
+            chunk_text = ' '.join(current_chunk_parts).strip()
             chunks.append({
                 "chunk_id": len(chunks),
-                "text": current_chunk.strip(),
+                "text": chunk_text,
                 "page_start": current_page,
                 "page_end": current_page,
-                "word_count": len(current_chunk.split())
+                "word_count": len(chunk_text.split())
             })
         
         return chunks
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Result caching for PDF processing coroutines
+"""
+import asyncio
+import functools
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+# Default number of results kept per memoized function. Several memoized
+# functions hold whole-document text, so this matches the number of open
+# documents pdf_processor keeps (PDF_CACHE_MAXSIZE) by default.
+RESULT_CACHE_MAXSIZE = int(os.getenv("PDF_READER_RESULT_CACHE_SIZE", "32"))
+
+
+def cached_by_mtime(func: Optional[Callable[..., Awaitable[Any]]] = None, *,
+                    maxsize: int = RESULT_CACHE_MAXSIZE):
+    """Memoize an async ``func(pdf_path, ...)`` until the file changes on disk
+
+    Results are keyed by the call arguments and invalidated when the file's
+    modification time changes. The pending future is cached rather than the
+    result, so concurrent callers for the same PDF share a single computation.
+    At most ``maxsize`` results are kept, least recently used evicted first.
+
+    Use as ``@cached_by_mtime`` or ``@cached_by_mtime(maxsize=...)``.
+    """
+    if func is None:
+        return functools.partial(cached_by_mtime, maxsize=maxsize)
+
+    cache: "OrderedDict[Tuple, Tuple[float, asyncio.Future]]" = OrderedDict()
+
+    @functools.wraps(func)
+    async def wrapper(pdf_path: str, *args, **kwargs):
+        try:
+            mtime = os.path.getmtime(pdf_path)
+        except OSError:
+            # Let the wrapped function report the missing file
+            return await func(pdf_path, *args, **kwargs)
+
+        key = (pdf_path, args, tuple(sorted(kwargs.items())))
+        entry = cache.get(key)
+        if entry is None or entry[0] != mtime:
+            future = asyncio.ensure_future(func(pdf_path, *args, **kwargs))
+            cache[key] = (mtime, future)
+        else:
+            future = entry[1]
+        cache.move_to_end(key)
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+
+        try:
+            # Shield so one cancelled caller doesn't cancel the shared work
+            return await asyncio.shield(future)
+        except BaseException:
+            # Don't keep failed computations around
+            if future.done() and cache.get(key, (None, None))[1] is future:
+                del cache[key]
+            raise
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
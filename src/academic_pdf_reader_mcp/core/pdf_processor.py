@@ -1,13 +1,245 @@
 """
 Core PDF processing functionality
 """
-import base64
+import asyncio
+import binascii
+import functools
+import itertools
+import logging
+import math
+import multiprocessing
 import os
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Literal, Optional, Any, Set, Tuple
 import fitz  # PyMuPDF
 
-# PDF caching
-pdf_cache: Dict[str, fitz.Document] = {}
+from .cache import cached_by_mtime
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedPDF:
+    """An open document plus the name and metadata read once when it was opened"""
+    doc: fitz.Document
+    basename: str
+    metadata: Dict[str, Any]
+    mtime: float
+
+# Most open documents kept in pdf_cache
+PDF_CACHE_MAXSIZE = 32
+
+# Rendered pages keyed by (path, page, dpi, format, colorspace), least recently used
+# evicted first. Entry sizes range from kilobytes to over a hundred MB for
+# large pages at high DPI, so the cache is bounded by total base64 bytes.
+RENDER_CACHE_MAX_BYTES = int(os.getenv("PDF_READER_RENDER_CACHE_BYTES", str(256 * 1024 * 1024)))
+_render_cache: "OrderedDict[Tuple[str, int, int, str, str], Tuple[float, bytes, float]]" = OrderedDict()
+_render_cache_bytes = 0
+
+# Quality for JPEG page renders; previews don't need lossless PNG
+JPEG_QUALITY = int(os.getenv("PDF_READER_JPEG_QUALITY", "85"))
+
+# Page render output formats. PyMuPDF has no WebP writer.
+RenderFormat = Literal["jpeg", "png"]
+
+# Page render colorspaces. Grayscale is one byte per pixel instead of three,
+# which is enough for text-only uses such as OCR.
+RenderColorspace = Literal["rgb", "gray"]
+_RENDER_COLORSPACES = {"rgb": fitz.csRGB, "gray": fitz.csGRAY}
+
+# Upper bound on rendered pixels per page. Oversized pages (posters, maps)
+# are rendered at a lower DPI instead of producing a huge pixmap. The default
+# fits A4 and Letter pages at up to 600 DPI (about 35 million pixels).
+MAX_RENDER_PIXELS = int(os.getenv("PDF_READER_MAX_RENDER_PIXELS", "40000000"))
+
+# Scale matrices for the usual render resolutions, built once. get_pixmap
+# only reads the matrix, so the instances can be shared.
+_MATRIX_CACHE = {dpi: fitz.Matrix(dpi / 72, dpi / 72) for dpi in (72, 96, 150, 200, 300, 600)}
+
+def _matrix_for(dpi: float) -> fitz.Matrix:
+    """Scale matrix for rendering at dpi"""
+    mat = _MATRIX_CACHE.get(dpi)
+    return mat if mat is not None else fitz.Matrix(dpi / 72, dpi / 72)
+
+def _render_cache_pop(key: Tuple[str, int, int, str, str]) -> None:
+    """Remove a render from the cache"""
+    global _render_cache_bytes
+    _render_cache_bytes -= len(_render_cache.pop(key)[1])
+
+def _render_cache_put(key: Tuple[str, int, int, str, str], value: Tuple[float, bytes, float]) -> None:
+    """Cache a render, evicting the oldest ones until RENDER_CACHE_MAX_BYTES fits"""
+    global _render_cache_bytes
+    size = len(value[1])
+    if size > RENDER_CACHE_MAX_BYTES:
+        return
+    if key in _render_cache:
+        _render_cache_pop(key)
+    _render_cache[key] = value
+    _render_cache_bytes += size
+    while _render_cache_bytes > RENDER_CACHE_MAX_BYTES:
+        _render_cache_pop(next(iter(_render_cache)))
+
+# Documents with at least this many pages are split across worker processes
+# for whole-document operations; smaller ones aren't worth the start-up and
+# re-open cost. 0 disables the process pool.
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_READER_PARALLEL_PAGES", "50")) or math.inf
+
+# Shared worker pool, created on first use
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool for page-parallel work"""
+    global _process_pool
+    if _process_pool is None:
+        # Never fork: the server process is multi-threaded (the MuPDF thread,
+        # to_thread workers), and a forked child could inherit a held MuPDF
+        # lock along with the parent's open documents. Workers reopen the
+        # PDF themselves, so they need nothing from this process's state.
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _process_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context(start_method))
+    return _process_pool
+
+# MuPDF calls run on one dedicated thread, off the event loop. Documents
+# aren't thread-safe, so a single thread serializes all access to them.
+_mupdf_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_mupdf_executor() -> ThreadPoolExecutor:
+    """Get the thread that runs blocking MuPDF calls"""
+    global _mupdf_executor
+    if _mupdf_executor is None:
+        _mupdf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mupdf")
+    return _mupdf_executor
+
+async def _run_blocking(func: Callable[..., Any], *args) -> Any:
+    """Run a blocking MuPDF call on the MuPDF thread"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_mupdf_executor(), func, *args)
+
+# Recently used text pages keyed by (document, page index), so repeated text
+# extraction of a page (whole-document, per-page, line and streaming calls)
+# shares one layout analysis. The page is
+# kept alongside because a TextPage only holds a weak reference to it. Only
+# used from the MuPDF thread or inside a worker process.
+TEXTPAGE_CACHE_MAXSIZE = 64
+_textpage_cache: "OrderedDict[Tuple[fitz.Document, int], Tuple[fitz.Page, fitz.TextPage]]" = OrderedDict()
+
+def _get_textpage(doc: fitz.Document, page_idx: int) -> Tuple[fitz.Page, fitz.TextPage]:
+    """Get a page and its TextPage, analysing the page only on a miss"""
+    key = (doc, page_idx)
+    cached = _textpage_cache.get(key)
+    if cached is not None:
+        _textpage_cache.move_to_end(key)
+        return cached
+    
+    page = doc.load_page(page_idx)
+    # Plain-text flags: no image blocks, so cached pages hold no image data
+    cached = (page, page.get_textpage(flags=fitz.TEXTFLAGS_TEXT))
+    _textpage_cache[key] = cached
+    if len(_textpage_cache) > TEXTPAGE_CACHE_MAXSIZE:
+        _textpage_cache.popitem(last=False)
+    return cached
+
+def _discard_textpages(doc: fitz.Document) -> None:
+    """Drop the cached text pages of a document"""
+    for key in [key for key in _textpage_cache if key[0] is doc]:
+        del _textpage_cache[key]
+
+def _close_now(doc: fitz.Document) -> None:
+    """Drop a document's text pages and close it (MuPDF thread)"""
+    _discard_textpages(doc)
+    doc.close()
+
+def _close_document(doc: fitz.Document) -> None:
+    """Close a document once work already queued on the MuPDF thread is done"""
+    _get_mupdf_executor().submit(_close_now, doc)
+
+def _file_mtime(pdf_path: str) -> Optional[float]:
+    """Modification time of a file, or None if it can't be stat'ed (one syscall)"""
+    try:
+        return os.stat(pdf_path).st_mtime
+    except OSError:
+        return None
+
+class PDFCache:
+    """LRU cache of open documents, keyed by path
+    
+    Evicted and stale (modified on disk) documents are closed. Also holds
+    per-path locks so concurrent first requests for a PDF share one open.
+    Must only be used from the event loop thread.
+    
+    The close is queued behind MuPDF work already submitted for the
+    document, but a document must not be held across an await: look it up
+    again afterwards instead of reusing the old handle.
+    """
+    
+    def __init__(self, maxsize: int = PDF_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, CachedPDF]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, pdf_path: str) -> bool:
+        return pdf_path in self._entries
+    
+    def get(self, pdf_path: str) -> Optional[CachedPDF]:
+        """Get the entry for a path, or None if missing or changed on disk"""
+        entry = self._entries.get(pdf_path)
+        if entry is None:
+            return None
+        if _file_mtime(pdf_path) != entry.mtime:
+            self.discard(pdf_path)
+            return None
+        self._entries.move_to_end(pdf_path)
+        return entry
+    
+    def put(self, pdf_path: str, entry: CachedPDF) -> None:
+        """Add an entry, evicting the least recently used past maxsize"""
+        self.discard(pdf_path)
+        self._entries[pdf_path] = entry
+        while len(self._entries) > self.maxsize:
+            self.discard(next(iter(self._entries)))
+    
+    def discard(self, pdf_path: str) -> None:
+        """Drop and close the entry for a path, if any"""
+        entry = self._entries.pop(pdf_path, None)
+        if entry is not None:
+            _close_document(entry.doc)
+        lock = self._locks.get(pdf_path)
+        if lock is not None and not lock.locked():
+            del self._locks[pdf_path]
+    
+    def lock(self, pdf_path: str) -> asyncio.Lock:
+        """Get the lock that serializes opening a path"""
+        return self._locks.setdefault(pdf_path, asyncio.Lock())
+    
+    def drop_lock(self, pdf_path: str) -> None:
+        """Forget the lock for a path that failed to open"""
+        self._locks.pop(pdf_path, None)
+    
+    def clear(self) -> None:
+        """Close and drop every entry"""
+        for pdf_path in list(self._entries):
+            self.discard(pdf_path)
+
+pdf_cache = PDFCache()
+
+def _apply_to_pages(page_fn: Callable[[fitz.Document, int], Any], doc: fitz.Document,
+                    page_indices: Iterable[int]) -> List[Any]:
+    """Apply page_fn to each of the given pages of doc"""
+    return [page_fn(doc, page_idx) for page_idx in page_indices]
+
+def _process_page_segment(pages_fn: Callable[[fitz.Document, Iterable[int]], List[Any]], pdf_path: str,
+                          start: int, end: int) -> List[Any]:
+    """Worker: run pages_fn over pages [start, end) of a freshly opened document"""
+    # fitz.Document can't be pickled, so each worker opens its own
+    with fitz.open(pdf_path) as doc:
+        try:
+            return pages_fn(doc, range(start, end))
+        finally:
+            _discard_textpages(doc)
 
 class PDFProcessor:
     """Handles basic PDF processing operations"""
@@ -15,23 +247,46 @@ class PDFProcessor:
     @staticmethod
     async def get_pdf_document(pdf_path: str) -> fitz.Document:
         """Get cached PDF document or load new one"""
-        if pdf_path in pdf_cache:
-            return pdf_cache[pdf_path]
+        return (await PDFProcessor.get_cached_pdf(pdf_path)).doc
+    
+    @staticmethod
+    async def get_cached_pdf(pdf_path: str) -> CachedPDF:
+        """Get the cache entry (document, basename, metadata) for a PDF,
+        opening it on a miss
         
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        The entry is shared; callers must not modify its metadata dict.
+        """
+        entry = pdf_cache.get(pdf_path)
+        if entry is not None:
+            return entry
         
-        doc = fitz.open(pdf_path)
-        pdf_cache[pdf_path] = doc
-        return doc
+        async with pdf_cache.lock(pdf_path):
+            # Another caller may have opened it while we waited
+            entry = pdf_cache.get(pdf_path)
+            if entry is not None:
+                return entry
+            
+            try:
+                entry = await _run_blocking(PDFProcessor._open_pdf, pdf_path)
+            except BaseException:
+                pdf_cache.drop_lock(pdf_path)
+                raise
+            
+            # Cache bookkeeping stays on the event loop thread
+            pdf_cache.put(pdf_path, entry)
+            return entry
     
     @staticmethod
-    async def get_metadata(pdf_path: str) -> Dict[str, Any]:
-        """Extract PDF metadata"""
-        doc = await PDFProcessor.get_pdf_document(pdf_path)
+    def _open_pdf(pdf_path: str) -> CachedPDF:
+        """Open a PDF and read its metadata"""
+        # fitz.open checks for the file itself; no separate stat needed
+        try:
+            doc = fitz.open(pdf_path)
+        except fitz.FileNotFoundError:
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}") from None
+        stat = os.stat(pdf_path)
         metadata = doc.metadata
-        
-        return {
+        entry = CachedPDF(doc=doc, basename=os.path.basename(pdf_path), mtime=stat.st_mtime, metadata={
             "title": metadata.get("title", ""),
             "author": metadata.get("author", ""),
             "subject": metadata.get("subject", ""),
@@ -41,59 +296,181 @@ class PDFProcessor:
             "modification_date": metadata.get("modDate", ""),
             "page_count": len(doc),
             "encrypted": doc.is_encrypted,
-            "file_size": os.path.getsize(pdf_path) if os.path.exists(pdf_path) else 0
-        }
+            "file_size": stat.st_size
+        })
+        return entry
+    
+    @staticmethod
+    async def get_metadata(pdf_path: str) -> Dict[str, Any]:
+        """Extract PDF metadata"""
+        entry = await PDFProcessor.get_cached_pdf(pdf_path)
+        # Copy so callers can't modify the cached dict
+        return dict(entry.metadata)
     
     @staticmethod
+    @cached_by_mtime
     async def extract_raw_text(pdf_path: str, page_num: Optional[int] = None) -> str:
         """Extract raw text from PDF"""
         doc = await PDFProcessor.get_pdf_document(pdf_path)
+        page_count = len(doc)
         
         if page_num is not None:
-            if 0 <= page_num < len(doc):
-                return doc[page_num].get_text()
+            if 0 <= page_num < page_count:
+                return await _run_blocking(PDFProcessor._page_text, doc, page_num)
             else:
                 raise ValueError(f"Page {page_num} not found in PDF")
         
-        # Extract all text
-        text = ""
-        for page in doc:
-            text += page.get_text() + "\n\n"
-        return text.strip()
+        # Extract all text; join once instead of growing a string per page
+        if page_count >= PARALLEL_PAGE_THRESHOLD:
+            page_texts = await PDFProcessor._run_page_segments(
+                pdf_path, functools.partial(_apply_to_pages, PDFProcessor._page_text), page_count
+            )
+        else:
+            page_texts = [text async for _, text in PDFProcessor.iter_raw_text(pdf_path)]
+        return "\n\n".join(page_texts).strip()
+    
+    @staticmethod
+    async def iter_raw_text(pdf_path: str) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (page_num, text) for each page, one page at a time
+        
+        Callers that process pages independently can use this instead of
+        extract_raw_text to avoid holding the whole document's text.
+        """
+        page_idx = 0
+        while True:
+            # Look the document up per page; it may be evicted and closed, or
+            # reopened after a change on disk, while the caller is suspended.
+            # Bounds are checked against the document just fetched.
+            doc = await PDFProcessor.get_pdf_document(pdf_path)
+            if page_idx >= len(doc):
+                return
+            yield page_idx, await _run_blocking(PDFProcessor._page_text, doc, page_idx)
+            page_idx += 1
+    
+    @staticmethod
+    async def extract_raw_lines(pdf_path: str) -> Tuple[str, ...]:
+        """Split the full-document raw text into lines
+        
+        Not memoized: the text itself is, and keeping the lines too would
+        pin a second full copy of it.
+        """
+        text = await PDFProcessor.extract_raw_text(pdf_path)
+        return tuple(text.split('\n'))
     
     @staticmethod
     async def extract_images(pdf_path: str, page_num: Optional[int] = None) -> List[Dict[str, Any]]:
         """Extract images from PDF"""
         doc = await PDFProcessor.get_pdf_document(pdf_path)
-        images = []
+        page_count = len(doc)
         
-        pages_to_process = [page_num] if page_num is not None else range(len(doc))
+        if page_num is None and page_count >= PARALLEL_PAGE_THRESHOLD:
+            page_images = await PDFProcessor._run_page_segments(pdf_path, PDFProcessor._images_in_pages, page_count)
+        else:
+            pages_to_process = PDFProcessor._pages_to_process(page_num, page_count)
+            page_images = await _run_blocking(PDFProcessor._images_in_pages, doc, pages_to_process)
         
-        for page_idx in pages_to_process:
-            if page_idx >= len(doc):
-                continue
-                
-            page = doc[page_idx]
-            image_list = page.get_images()
+        return PDFProcessor._link_duplicate_images(itertools.chain.from_iterable(page_images))
+    
+    @staticmethod
+    def _pages_to_process(page_num: Optional[int], page_count: int) -> Iterable[int]:
+        """All pages, or just page_num when given; out-of-range pages yield nothing
+        
+        Page functions load pages with doc.load_page, which skips doc[...]'s
+        membership check (and accepts negative indices), so the bounds are
+        checked once here instead.
+        """
+        if page_num is None:
+            return range(page_count)
+        return [page_num] if 0 <= page_num < page_count else []
+    
+    @staticmethod
+    def _images_in_pages(doc: fitz.Document, page_indices: Iterable[int]) -> List[List[Dict[str, Any]]]:
+        """Extract the images of each page, encoding each xref only once"""
+        seen_xrefs: Set[int] = set()
+        return [PDFProcessor._page_images(doc, page_idx, seen_xrefs) for page_idx in page_indices]
+    
+    @staticmethod
+    def _link_duplicate_images(images: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace repeat occurrences of an image with a reference to the first
+        
+        An image used on several pages (logos, headers) keeps its data_bytes
+        only in its first entry; later entries get "ref_to", that entry's list
+        index.
+        """
+        linked = []
+        first_index: Dict[int, int] = {}
+        for image in images:
+            xref = image["xref"]
+            if xref in first_index:
+                first = linked[first_index[xref]]
+                image = {
+                    "page": image["page"],
+                    "index": image["index"],
+                    "xref": xref,
+                    "width": first["width"],
+                    "height": first["height"],
+                    "format": first["format"],
+                    "ref_to": first_index[xref]
+                }
+            else:
+                first_index[xref] = len(linked)
+            linked.append(image)
+        return linked
+    
+    @staticmethod
+    def _page_images(doc: fitz.Document, page_idx: int,
+                     seen_xrefs: Optional[Set[int]] = None) -> List[Dict[str, Any]]:
+        """Extract the images of a single page
+        
+        Images whose xref is in seen_xrefs are returned without data_bytes, to be
+        linked to their first occurrence; newly extracted xrefs are added.
+        """
+        images = []
+        page = doc.load_page(page_idx)
+        image_list = page.get_images()
+        
+        for img_index, img in enumerate(image_list):
+            xref = img[0]
+            if seen_xrefs is not None:
+                if xref in seen_xrefs:
+                    images.append({"page": page_idx, "index": img_index, "xref": xref})
+                    continue
+            
+            # The stored stream as-is when it is already a standalone image
+            # file (JPEG, PNG, ...); MuPDF only re-encodes other filters.
+            # get_images already names plain CMYK images (img[5]), which
+            # extract_image would read in full only for them to be rejected.
+            info = None if img[5] == "DeviceCMYK" else doc.extract_image(xref)
+            if info and info["colorspace"] < 4:
+                img_data = info["image"]
+                img_format = info["ext"]
+                width, height = info["width"], info["height"]
+            else:
+                # CMYK, or nothing extract_image could return: decode to a
+                # GRAY/RGB pixmap and encode that as PNG
+                try:
+                    pix = fitz.Pixmap(doc, xref)
+                except (RuntimeError, ValueError):
+                    continue
+                if pix.n - pix.alpha >= 4:
+                    pix = fitz.Pixmap(fitz.csRGB, pix)
+                img_data = pix.tobytes("png")
+                img_format = "png"
+                width, height = pix.width, pix.height
+            
+            if seen_xrefs is not None:
+                seen_xrefs.add(xref)
             
-            for img_index, img in enumerate(image_list):
-                xref = img[0]
-                pix = fitz.Pixmap(doc, xref)
-                
-                if pix.n - pix.alpha < 4:  # GRAY or RGB
-                    img_data = pix.tobytes("png")
-                    img_b64 = base64.b64encode(img_data).decode()
-                    
-                    images.append({
-                        "page": page_idx,
-                        "index": img_index,
-                        "width": pix.width,
-                        "height": pix.height,
-                        "data": img_b64,
-                        "format": "png"
-                    })
-                
-                pix = None
+            images.append({
+                "page": page_idx,
+                "index": img_index,
+                "xref": xref,
+                "width": width,
+                "height": height,
+                # Raw encoded bytes; callers base64-encode only what they emit
+                "data_bytes": img_data,
+                "format": img_format
+            })
         
         return images
     
@@ -101,89 +478,189 @@ class PDFProcessor:
     async def extract_tables(pdf_path: str, page_num: Optional[int] = None) -> List[Dict[str, Any]]:
         """Extract table-like structures from PDF"""
         doc = await PDFProcessor.get_pdf_document(pdf_path)
-        tables = []
+        page_count = len(doc)
         
-        pages_to_process = [page_num] if page_num is not None else range(len(doc))
+        if page_num is None and page_count >= PARALLEL_PAGE_THRESHOLD:
+            page_tables = await PDFProcessor._run_page_segments(
+                pdf_path, functools.partial(_apply_to_pages, PDFProcessor._page_tables), page_count
+            )
+            return list(itertools.chain.from_iterable(page_tables))
         
-        for page_idx in pages_to_process:
-            if page_idx >= len(doc):
-                continue
-                
-            page = doc[page_idx]
-            
-            # Find tables using text blocks and positioning
-            tabs = page.find_tables()
-            for tab_idx, tab in enumerate(tabs):
-                table_data = tab.extract()
-                tables.append({
-                    "page": page_idx,
-                    "table_index": tab_idx,
-                    "data": table_data,
-                    "bbox": tab.bbox
-                })
+        pages_to_process = PDFProcessor._pages_to_process(page_num, page_count)
         
-        return tables
+        page_tables = await _run_blocking(_apply_to_pages, PDFProcessor._page_tables, doc, pages_to_process)
+        return list(itertools.chain.from_iterable(page_tables))
+    
+    @staticmethod
+    def _page_tables(doc: fitz.Document, page_idx: int) -> List[Dict[str, Any]]:
+        """Extract table-like structures from a single page"""
+        page = doc.load_page(page_idx)
+        
+        # Find tables using text blocks and positioning
+        return [
+            {
+                "page": page_idx,
+                "table_index": tab_idx,
+                "data": tab.extract(),
+                "bbox": tab.bbox
+            }
+            for tab_idx, tab in enumerate(page.find_tables())
+        ]
     
     @staticmethod
     async def extract_annotations(pdf_path: str) -> List[Dict[str, Any]]:
         """Extract annotations/comments from PDF"""
         doc = await PDFProcessor.get_pdf_document(pdf_path)
-        annotations = []
+        page_count = len(doc)
         
-        for page_idx, page in enumerate(doc):
-            for annot in page.annots():
-                annotations.append({
-                    "page": page_idx,
-                    "type": annot.type[1],  # Get annotation type name
-                    "content": annot.info.get("content", ""),
-                    "author": annot.info.get("title", ""),
-                    "rect": list(annot.rect),
-                    "created": annot.info.get("creationDate", ""),
-                    "modified": annot.info.get("modDate", "")
-                })
+        if page_count >= PARALLEL_PAGE_THRESHOLD:
+            page_annotations = await PDFProcessor._run_page_segments(
+                pdf_path, functools.partial(_apply_to_pages, PDFProcessor._page_annotations), page_count
+            )
+            return list(itertools.chain.from_iterable(page_annotations))
         
-        return annotations
+        page_annotations = await _run_blocking(
+            _apply_to_pages, PDFProcessor._page_annotations, doc, range(page_count)
+        )
+        return list(itertools.chain.from_iterable(page_annotations))
     
     @staticmethod
-    async def render_page(pdf_path: str, page_num: int, dpi: int = 150) -> str:
-        """Render a PDF page as base64 image"""
-        doc = await PDFProcessor.get_pdf_document(pdf_path)
+    def _page_annotations(doc: fitz.Document, page_idx: int) -> List[Dict[str, Any]]:
+        """Extract annotations/comments from a single page"""
+        page = doc.load_page(page_idx)
+        # Most pages have no /Annots; skip building the annotation iterator
+        if not page.annot_xrefs():
+            return []
+        
+        # annot.info re-reads the annotation's PDF object on every access, so
+        # bind it once per annotation
+        return [
+            {
+                "page": page_idx,
+                "type": annot.type[1],  # Get annotation type name
+                "content": (info := annot.info).get("content", ""),
+                "author": info.get("title", ""),
+                "rect": (*annot.rect,),
+                "created": info.get("creationDate", ""),
+                "modified": info.get("modDate", "")
+            }
+            for annot in page.annots()
+        ]
+    
+    @staticmethod
+    def _page_text(doc: fitz.Document, page_idx: int) -> str:
+        """Extract raw text from a single page"""
+        page, textpage = _get_textpage(doc, page_idx)
+        return page.get_text(textpage=textpage)
+    
+    @staticmethod
+    async def _run_page_segments(pdf_path: str, pages_fn: Callable[[fitz.Document, Iterable[int]], List[Any]],
+                                 page_count: int) -> List[Any]:
+        """Run pages_fn over every page, splitting the page range across worker processes
+        
+        pages_fn(doc, page_indices) returns one result per page; the results
+        of all segments are returned in page order.
+        """
+        n_workers = os.cpu_count() or 1
+        seg_size = math.ceil(page_count / n_workers)
+        loop = asyncio.get_running_loop()
+        pool = _get_process_pool()
+        
+        segments = await asyncio.gather(*(
+            loop.run_in_executor(pool, _process_page_segment, pages_fn, pdf_path,
+                                 start, min(start + seg_size, page_count))
+            for start in range(0, page_count, seg_size)
+        ))
+        return list(itertools.chain.from_iterable(segments))
+    
+    @staticmethod
+    async def render_page(pdf_path: str, page_num: int, dpi: int = 150, format: RenderFormat = "jpeg",
+                          colorspace: RenderColorspace = "rgb") -> Tuple[bytes, float]:
+        """Render a PDF page as a base64-encoded JPEG or PNG (ASCII bytes)
+        
+        Returns the image and the DPI it was rendered at, which is lower than
+        dpi for pages too large to render within MAX_RENDER_PIXELS.
+        """
+        if format not in ("jpeg", "png"):
+            raise ValueError(f"Unsupported image format: {format}")
+        if colorspace not in _RENDER_COLORSPACES:
+            raise ValueError(f"Unsupported colorspace: {colorspace}")
+        
+        key = (pdf_path, page_num, dpi, format, colorspace)
+        cached = _render_cache.get(key)
+        if cached is not None:
+            mtime, img_b64, rendered_dpi = cached
+            if _file_mtime(pdf_path) == mtime:
+                _render_cache.move_to_end(key)
+                return img_b64, rendered_dpi
+            _render_cache_pop(key)
         
-        if page_num >= len(doc):
+        entry = await PDFProcessor.get_cached_pdf(pdf_path)
+        doc = entry.doc
+        
+        if not 0 <= page_num < len(doc):
             raise ValueError(f"Page {page_num} not found in PDF")
         
-        page = doc[page_num]
-        mat = fitz.Matrix(dpi/72, dpi/72)  # Scale factor
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        img_b64 = base64.b64encode(img_data).decode()
+        img_b64, rendered_dpi = await _run_blocking(
+            PDFProcessor._render_page_image, doc, page_num, dpi, format, colorspace
+        )
         
-        return img_b64
+        # The mtime the document was opened at; no further stat needed
+        _render_cache_put(key, (entry.mtime, img_b64, rendered_dpi))
+        return img_b64, rendered_dpi
+    
+    @staticmethod
+    def _render_page_image(doc: fitz.Document, page_num: int, dpi: float, format: RenderFormat,
+                           colorspace: RenderColorspace = "rgb") -> Tuple[bytes, float]:
+        """Render one page and base64-encode the image; also returns the DPI used"""
+        page = doc.load_page(page_num)
+        
+        pixels = (page.rect.width / 72 * dpi) * (page.rect.height / 72 * dpi)
+        if pixels > MAX_RENDER_PIXELS:
+            scaled_dpi = dpi * math.sqrt(MAX_RENDER_PIXELS / pixels)
+            logger.warning("Page %d is too large to render at %d DPI; using %.0f DPI",
+                           page_num, dpi, scaled_dpi)
+            dpi = scaled_dpi
+        
+        # Rendered pages are opaque; an alpha channel would only add a
+        # fourth byte per pixel to encode
+        pix = page.get_pixmap(matrix=_matrix_for(dpi), colorspace=_RENDER_COLORSPACES[colorspace], alpha=False)
+        # JPEG encodes several times faster than deflated PNG and is smaller;
+        # with no alpha channel, nothing is lost by dropping PNG
+        if format == "jpeg":
+            img_data = pix.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+        else:
+            img_data = pix.tobytes("png")
+        del pix
+        
+        # Keep the base64 as bytes; decoding to str would add a third
+        # full-size copy of the image to peak memory
+        return binascii.b2a_base64(img_data, newline=False), dpi
     
     @staticmethod
     async def get_page_blocks(pdf_path: str, page_num: int) -> List[Dict[str, Any]]:
         """Extract text blocks with positioning for academic processing"""
         doc = await PDFProcessor.get_pdf_document(pdf_path)
         
-        if page_num >= len(doc):
+        if not 0 <= page_num < len(doc):
             raise ValueError(f"Page {page_num} not found in PDF")
         
-        page = doc[page_num]
-        blocks = page.get_text("dict")["blocks"]
-        
-        text_blocks = []
-        for block in blocks:
-            if "lines" in block:  # Text block
-                block_text = ""
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        block_text += span["text"]
-                    block_text += "\n"
-                
-                text_blocks.append({
-                    "text": block_text.strip(),
-                    "bbox": block["bbox"],
-                    "block_no": block["number"]
-                })
+        return await _run_blocking(PDFProcessor._page_blocks, doc, page_num)
+    
+    @staticmethod
+    def _page_blocks(doc: fitz.Document, page_num: int) -> List[Dict[str, Any]]:
+        """Extract the text blocks of a single page"""
+        # (x0, y0, x1, y1, text, block_no, block_type) tuples built in C;
+        # block_type 0 is text. The "dict" flags keep image blocks so block
+        # numbers stay the same as in the span-level output. That text page
+        # holds image data, so it is built per call rather than cached.
+        page = doc.load_page(page_num)
+        blocks = page.get_text("blocks", flags=fitz.TEXTFLAGS_DICT)
+        
+        text_blocks = [
+            {"text": block[4].strip(), "bbox": block[:4], "block_no": block[5]}
+            for block in blocks
+            if block[6] == 0
+        ]
         
         return text_blocks
\ No newline at end of file
@@ -1,38 +1,96 @@
 """
 Academic PDF Reader MCP Server with enhanced capabilities
 """
+import asyncio
 import json
 import os
-from typing import Dict, Any, Optional
+import sys
+from typing import Dict, Any, List, Optional, Tuple
 import uuid
 
 from mcp.server.fastmcp import FastMCP
 import mcp.types as types
 
-from .core.pdf_processor import PDFProcessor
+from .core.pdf_processor import PDFProcessor, RenderColorspace, RenderFormat
 from .academic.text_processor import AcademicTextProcessor
 from .academic.section_detector import SectionDetector
 from .academic.citation_parser import CitationParser
 
+# Optional faster JSON encoder (pip install orjson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _jdumps(obj: Any) -> str:
+    """Serialize obj as 2-space indented JSON, with orjson when installed
+    
+    Non-ASCII text is written as-is on both paths (orjson can't escape it),
+    so the output doesn't depend on which encoder is available.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
 # PDF file storage
 pdf_files: Dict[str, Dict[str, Any]] = {}
 
 # Create FastMCP server
 mcp_server = FastMCP("academic-pdf-reader")
 
+# Tools return formatted text or content blocks. They are registered with
+# structured_output=False; otherwise FastMCP also sends every response a
+# second time as {"result": ...} structured content, doubling the payload
+# (a rendered page would carry its base64 image twice).
+
 # Basic PDF Tools
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def load_pdf(file_path: str, name: str = None) -> str:
     """Load a PDF file for processing
     Args:
         file_path (str): Path to the PDF file
         name (str, optional): Custom name for the PDF. Defaults to filename.    
     """
-    if not file_path or not os.path.exists(file_path):
+    file_id, display_name, metadata = await _register_pdf(file_path, name)
+    return f"Loaded PDF: {display_name}\nPages: {metadata['page_count']}\nFile ID: {file_id}"
+
+@mcp_server.tool(structured_output=False)
+async def load_pdfs(file_paths: List[str]) -> str:
+    """Load several PDF files for processing at once
+    
+    Returns one line per path, in order: "file_id<TAB>name" for a loaded
+    file, or "error<TAB>path: reason" for one that failed to load.
+    Args:
+        file_paths (List[str]): Paths to the PDF files
+    """
+    # One bad path must not hide the file_ids of the files that did load
+    loaded = await asyncio.gather(*(_register_pdf(file_path) for file_path in file_paths),
+                                  return_exceptions=True)
+    lines = []
+    for file_path, result in zip(file_paths, loaded):
+        if isinstance(result, Exception):
+            lines.append(f"error\t{file_path}: {result}")
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            file_id, display_name, _ = result
+            lines.append(f"{file_id}\t{display_name}")
+    return "\n".join(lines)
+
+async def _register_pdf(file_path: str, name: str = None) -> Tuple[str, str, Dict[str, Any]]:
+    """Open a PDF and record it in pdf_files; returns (file_id, name, metadata)"""
+    if not file_path:
         raise ValueError(f"File not found: {file_path}")
     
-    display_name = name or os.path.basename(file_path)
-    metadata = await PDFProcessor.get_metadata(file_path)
+    # Opening the PDF is the existence check; a separate os.path.exists
+    # would stat the file once more on every load
+    try:
+        entry = await PDFProcessor.get_cached_pdf(file_path)
+    except FileNotFoundError:
+        raise ValueError(f"File not found: {file_path}") from None
+    # The cache entry carries the basename and metadata read at open time
+    display_name = name or entry.basename
+    metadata = dict(entry.metadata)
     file_id = str(uuid.uuid4())
     
     pdf_files[file_id] = {
@@ -42,15 +100,15 @@ async def load_pdf(file_path: str, name: str = None) -> str:
         "metadata": metadata
     }
     
-    return f"Loaded PDF: {display_name}\nPages: {metadata['page_count']}\nFile ID: {file_id}"
+    return file_id, display_name, metadata
 
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def get_metadata(file_path: str) -> str:
     """Get PDF metadata and document information"""
     metadata = await PDFProcessor.get_metadata(file_path)
-    return f"PDF Metadata:\n{json.dumps(metadata, indent=2)}"
+    return f"PDF Metadata:\n{_jdumps(metadata)}"
 
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def extract_images(file_path: str, page: Optional[int] = None) -> str:
     """
     Extract images from PDF
@@ -60,47 +118,58 @@ async def extract_images(file_path: str, page: Optional[int] = None) -> str:
     """
     images = await PDFProcessor.extract_images(file_path, page)
     
-    result = f"Found {len(images)} images"
+    parts = [f"Found {len(images)} images"]
     if page is not None:
-        result += f" on page {page}"
+        parts.append(f" on page {page}")
     
     if images:
-        result += "\n\nImage details:\n"
-        for img in images:
-            result += f"- Page {img['page']}: {img['width']}x{img['height']} pixels\n"
+        parts.append("\n\nImage details:\n")
+        parts.extend(f"- Page {img['page']}: {img['width']}x{img['height']} pixels\n" for img in images)
     
-    return result
+    return "".join(parts)
 
-@mcp_server.tool()
-async def render_page(file_path: str, page: int, dpi: int = 150) -> str:
+@mcp_server.tool(structured_output=False)
+async def render_page(file_path: str, page: int, dpi: int = 150, format: RenderFormat = "jpeg",
+                      colorspace: RenderColorspace = "rgb") -> List[types.ContentBlock]:
     """Render a PDF page as an image
     Args:
         file_path (str): Path to the PDF file
         page (int): Page number to render
         dpi (int, optional): DPI for rendering. Defaults to 150.
+        format (str, optional): Image format, "jpeg" or "png". Defaults to "jpeg".
+        colorspace (str, optional): "rgb" or "gray"; gray is smaller and enough for OCR. Defaults to "rgb".
     """
-    img_b64 = await PDFProcessor.render_page(file_path, page, dpi)
-    return f"Rendered page {page} at {dpi} DPI\nImage size: {len(img_b64)} characters"
+    img_b64, rendered_dpi = await PDFProcessor.render_page(file_path, page, dpi, format, colorspace)
+    if rendered_dpi == dpi:
+        summary = f"Rendered page {page} at {dpi} DPI as {format}"
+    else:
+        summary = (f"Rendered page {page} at {rendered_dpi:.0f} DPI as {format} "
+                   f"(reduced from {dpi} DPI to stay within the pixel limit)")
+    # MCP carries image data as base64 text; hand over the encoded render
+    # as-is rather than letting FastMCP's Image encode the raw bytes again
+    return [
+        types.TextContent(type="text", text=summary),
+        types.ImageContent(type="image", data=img_b64.decode("ascii"), mimeType=f"image/{format}")
+    ]
 
 # Academic Enhancement Tools
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def extract_academic_text(file_path: str, page: int = None) -> str:
     """Extract text with proper academic reading order and formatting"""
     if page is not None:
         result = await AcademicTextProcessor._process_single_page(file_path, page)
-        text_info = f"Page {page} processed text:\n{result['processed_text']}"
+        parts = [f"Page {page} processed text:\n{result['processed_text']}"]
         
         if result['math_formulas']:
-            text_info += f"\n\nMath formulas found: {len(result['math_formulas'])}"
-            for i, formula in enumerate(result['math_formulas'][:3]):
-                text_info += f"\n  Formula {i+1}: {formula}"
+            parts.append(f"\n\nMath formulas found: {len(result['math_formulas'])}")
+            parts.extend(f"\n  Formula {i+1}: {formula}" for i, formula in enumerate(result['math_formulas'][:3]))
         
-        return text_info
+        return "".join(parts)
     else:
         result = await AcademicTextProcessor.extract_academic_text(file_path)
         return f"Full document processed:\n\n{result['full_text'][:2000]}{'...' if len(result['full_text']) > 2000 else ''}"
 
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def detect_sections(file_path: str) -> str:
     """
     Detect and extract academic paper sections
@@ -113,16 +182,16 @@ async def detect_sections(file_path: str) -> str:
     if not sections:
         return "No academic sections detected in this PDF."
     
-    result = f"Detected {len(sections)} academic sections:\n\n"
+    parts = [f"Detected {len(sections)} academic sections:\n\n"]
     
     for section_name, section_data in sections.items():
         content_preview = section_data["content"][:200]
-        result += f"**{section_name.upper()}** ({section_data['word_count']} words)\n"
-        result += f"{content_preview}{'...' if len(section_data['content']) > 200 else ''}\n\n"
+        parts.append(f"**{section_name.upper()}** ({section_data['word_count']} words)\n")
+        parts.append(f"{content_preview}{'...' if len(section_data['content']) > 200 else ''}\n\n")
     
-    return result
+    return "".join(parts)
 
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def extract_abstract(file_path: str) -> str:
     """
     Extract the abstract from an academic paper
@@ -134,15 +203,14 @@ async def extract_abstract(file_path: str) -> str:
     if not abstract_data["found"]:
         return "No abstract found in this PDF."
     
-    result = f"Abstract ({abstract_data['word_count']} words):\n\n"
-    result += abstract_data["abstract"]
+    parts = [f"Abstract ({abstract_data['word_count']} words):\n\n", abstract_data["abstract"]]
     
     if "method" in abstract_data:
-        result += f"\n\n[Extracted using {abstract_data['method']} method]"
+        parts.append(f"\n\n[Extracted using {abstract_data['method']} method]")
     
-    return result
+    return "".join(parts)
 
-@mcp_server.tool() 
+@mcp_server.tool(structured_output=False)
 async def extract_key_sections(file_path: str) -> str:
     """
     Extract key academic sections optimized for agent understanding
@@ -154,14 +222,12 @@ async def extract_key_sections(file_path: str) -> str:
     if not key_sections:
         return "No key academic sections found."
     
-    result = "Key sections extracted for analysis:\n\n"
-    
-    for section_name, content in key_sections.items():
-        result += f"**{section_name.upper()}**\n{content}\n\n---\n\n"
+    parts = ["Key sections extracted for analysis:\n\n"]
+    parts.extend(f"**{section_name.upper()}**\n{content}\n\n---\n\n" for section_name, content in key_sections.items())
     
-    return result
+    return "".join(parts)
 
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def extract_citations(file_path: str) -> str:
     """
     Extract citations and references from the academic paper
@@ -170,24 +236,26 @@ async def extract_citations(file_path: str) -> str:
     """
     citation_data = await CitationParser.extract_citations(file_path)
     
-    result = f"Citation Analysis:\n"
-    result += f"- In-text citations: {citation_data['citation_count']}\n"
-    result += f"- Reference list entries: {citation_data['reference_count']}\n"
-    result += f"- Citation style: {citation_data['citation_style']}\n\n"
+    parts = [
+        "Citation Analysis:\n",
+        f"- In-text citations: {citation_data['citation_count']}\n",
+        f"- Reference list entries: {citation_data['reference_count']}\n",
+        f"- Citation style: {citation_data['citation_style']}\n\n",
+    ]
     
     if citation_data["in_text_citations"]:
-        result += "Sample in-text citations:\n"
-        for citation in citation_data["in_text_citations"][:5]:
-            result += f"  {citation['citation']} - {citation['type']}\n"
+        parts.append("Sample in-text citations:\n")
+        parts.extend(f"  {citation['citation']} - {citation['type']}\n"
+                     for citation in citation_data["in_text_citations"][:5])
     
     if citation_data["references"]:
-        result += f"\nFirst few references:\n"
-        for ref in citation_data["references"][:3]:
-            result += f"  [{ref['reference_number']}] {ref['raw_text'][:100]}...\n"
+        parts.append("\nFirst few references:\n")
+        parts.extend(f"  [{ref['reference_number']}] {ref['raw_text'][:100]}...\n"
+                     for ref in citation_data["references"][:3])
     
-    return result
+    return "".join(parts)
 
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def chunk_content(file_path: str, chunk_size: int = 1000) -> str:
     """
     Break PDF content into agent-friendly chunks
@@ -197,51 +265,65 @@ async def chunk_content(file_path: str, chunk_size: int = 1000) -> str:
     """
     chunks = await AcademicTextProcessor.chunk_academic_content(file_path, chunk_size)
     
-    result = f"Content chunked into {len(chunks)} segments:\n\n"
+    parts = [f"Content chunked into {len(chunks)} segments:\n\n"]
     
     for i, chunk in enumerate(chunks[:5]):  # Show first 5 chunks
-        result += f"**Chunk {i+1}** (Pages {chunk['page_start']}-{chunk['page_end']}, {chunk['word_count']} words)\n"
-        result += f"{chunk['text'][:200]}...\n\n"
+        parts.append(f"**Chunk {i+1}** (Pages {chunk['page_start']}-{chunk['page_end']}, {chunk['word_count']} words)\n")
+        parts.append(f"{chunk['text'][:200]}...\n\n")
     
     if len(chunks) > 5:
-        result += f"... and {len(chunks) - 5} more chunks\n"
+        parts.append(f"... and {len(chunks) - 5} more chunks\n")
     
-    return result
+    return "".join(parts)
 
-@mcp_server.tool()
+@mcp_server.tool(structured_output=False)
 async def analyze_document_structure(file_path: str) -> str:
     """
     Analyze the overall structure and characteristics of the academic document
     Args:
         file_path (str): Path to the PDF file
     """
-    section_summary = await SectionDetector.get_section_summary(file_path)
-    citation_summary = await CitationParser.get_citation_summary(file_path)
-    metadata = await PDFProcessor.get_metadata(file_path)
+    # Independent lookups; run them concurrently
+    section_summary, citation_summary, metadata = await asyncio.gather(
+        SectionDetector.get_section_summary(file_path),
+        CitationParser.get_citation_summary(file_path),
+        PDFProcessor.get_metadata(file_path)
+    )
     
-    result = f"Document Structure Analysis:\n\n"
-    result += f"**Document Type**: {section_summary['estimated_structure']}\n"
-    result += f"**Total Pages**: {metadata['page_count']}\n"
-    result += f"**Academic Sections Found**: {section_summary['total_sections']}\n\n"
+    parts = [
+        "Document Structure Analysis:\n\n",
+        f"**Document Type**: {section_summary['estimated_structure']}\n",
+        f"**Total Pages**: {metadata['page_count']}\n",
+        f"**Academic Sections Found**: {section_summary['total_sections']}\n\n",
+        "**Section Coverage**:\n",
+    ]
     
-    result += "**Section Coverage**:\n"
     for section, present in section_summary.items():
         if section.startswith('has_') and present:
             section_name = section.replace('has_', '').replace('_', ' ').title()
-            result += f"  ✓ {section_name}\n"
+            parts.append(f"  ✓ {section_name}\n")
     
-    result += f"\n**Citation Profile**:\n"
-    result += f"  - Total citations: {citation_summary['total_citations']}\n"
-    result += f"  - Reference count: {citation_summary['total_references']}\n"
-    result += f"  - Citation style: {citation_summary['citation_style']}\n"
+    parts.append("\n**Citation Profile**:\n")
+    parts.append(f"  - Total citations: {citation_summary['total_citations']}\n")
+    parts.append(f"  - Reference count: {citation_summary['total_references']}\n")
+    parts.append(f"  - Citation style: {citation_summary['citation_style']}\n")
     
     if citation_summary['reference_years']['min_year']:
-        result += f"  - Reference span: {citation_summary['reference_years']['min_year']}-{citation_summary['reference_years']['max_year']}\n"
-        result += f"  - Recent refs (2015+): {citation_summary['reference_years']['recent_references']}\n"
+        parts.append(f"  - Reference span: {citation_summary['reference_years']['min_year']}-{citation_summary['reference_years']['max_year']}\n")
+        parts.append(f"  - Recent refs (2015+): {citation_summary['reference_years']['recent_references']}\n")
     
-    return result
+    return "".join(parts)
 
 # Academic Prompts
+
+# Summary instructions for each summarize_academic_paper focus
+FOCUS_INSTRUCTIONS = {
+    "general": "Provide a comprehensive overview suitable for researchers",
+    "methodology": "Focus on research methods, data collection, and analysis approaches",
+    "results": "Emphasize findings, results, and statistical outcomes",
+    "implications": "Highlight conclusions, implications, and future research directions"
+}
+
 @mcp_server.prompt()
 async def summarize_academic_paper(file_path: str, focus: str = "general") -> types.PromptMessage:
     """
@@ -250,18 +332,13 @@ async def summarize_academic_paper(file_path: str, focus: str = "general") -> ty
         file_path (str): Path to the PDF file
         focus (str, optional): Summary focus. Defaults to "general".
     """
-    key_sections = await SectionDetector.extract_key_sections(file_path)
-    metadata = await PDFProcessor.get_metadata(file_path)
-    citation_summary = await CitationParser.get_citation_summary(file_path)
-    
-    focus_instructions = {
-        "general": "Provide a comprehensive overview suitable for researchers",
-        "methodology": "Focus on research methods, data collection, and analysis approaches",
-        "results": "Emphasize findings, results, and statistical outcomes",
-        "implications": "Highlight conclusions, implications, and future research directions"
-    }
+    key_sections, metadata, citation_summary = await asyncio.gather(
+        SectionDetector.extract_key_sections(file_path),
+        PDFProcessor.get_metadata(file_path),
+        CitationParser.get_citation_summary(file_path)
+    )
     
-    instruction = focus_instructions.get(focus, focus_instructions["general"])
+    instruction = FOCUS_INSTRUCTIONS.get(focus, FOCUS_INSTRUCTIONS["general"])
     
     content = f"""Please provide an academic summary of this research paper focusing on {focus}.
 
@@ -276,8 +353,8 @@ Document Information:
 Key Sections Available:
 """
     
-    for section_name, section_content in key_sections.items():
-        content += f"\n**{section_name.upper()}:**\n{section_content}\n"
+    content += "".join(f"\n**{section_name.upper()}:**\n{section_content}\n"
+                       for section_name, section_content in key_sections.items())
     
     return types.PromptMessage(
         role="user",
@@ -324,14 +401,16 @@ async def read_pdf_resource(path: str) -> str:
         path (str): Path to the PDF file
     """
     try:
-        key_sections = await SectionDetector.extract_key_sections(path)
-        metadata = await PDFProcessor.get_metadata(path)
+        key_sections, metadata = await asyncio.gather(
+            SectionDetector.extract_key_sections(path),
+            PDFProcessor.get_metadata(path)
+        )
         
-        return json.dumps({
+        return _jdumps({
             "metadata": metadata,
             "key_sections": key_sections,
             "document_type": "academic_paper" if key_sections else "general_pdf"
-        }, indent=2)
+        })
     except Exception as e:
         raise ValueError(f"Error reading PDF: {str(e)}")
 
@@ -341,6 +420,19 @@ def main():
     # stdio is useful for debugging
     # choose transport based on environment
     transport = os.getenv("PDF_READER_TRANSPORT", "sse")
+    
+    # Use uvloop's libuv-based event loop when it's installed. FastMCP
+    # starts the loop via anyio, which creates it through the loop policy.
+    # Loop policies (and uvloop.install()) are deprecated from Python 3.14
+    # and FastMCP.run takes no loop factory, so 3.14+ keeps the default loop.
+    if sys.version_info < (3, 14):
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     mcp_server.run(transport=transport)
 
 if __name__ == "__main__":
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Tests for the result memoizer and the open-document cache
+"""
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import fitz
+import pytest
+
+from academic_pdf_reader_mcp.core import pdf_processor
+from academic_pdf_reader_mcp.core.cache import cached_by_mtime
+from academic_pdf_reader_mcp.core.pdf_processor import PDFCache, PDFProcessor
+from academic_pdf_reader_mcp.academic.text_processor import AcademicTextProcessor
+
+
+def make_pdf(path, pages=1):
+    """Write a PDF with one line of text per page"""
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {i} text")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def touch(path):
+    """Move a file's mtime forward so caches see it as changed"""
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 5))
+
+
+async def flush_mupdf_thread():
+    """Wait for work (including queued closes) on the MuPDF thread"""
+    await pdf_processor._run_blocking(lambda: None)
+
+
+@pytest.fixture
+def small_pdf_cache(monkeypatch):
+    """Swap in a two-entry document cache for the test"""
+    cache = PDFCache(maxsize=2)
+    monkeypatch.setattr(pdf_processor, "pdf_cache", cache)
+    return cache
+
+
+# cached_by_mtime
+
+def test_concurrent_callers_share_one_computation(tmp_path):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    calls = []
+
+    @cached_by_mtime
+    async def compute(path):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def run():
+        return await asyncio.gather(*(compute(pdf_path) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_result_invalidated_when_file_changes(tmp_path):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    calls = []
+
+    @cached_by_mtime
+    async def compute(path):
+        calls.append(path)
+        return len(calls)
+
+    async def run():
+        first = await compute(pdf_path)
+        assert await compute(pdf_path) == first
+        touch(pdf_path)
+        return first, await compute(pdf_path)
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_failures_are_not_cached(tmp_path):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    calls = []
+
+    @cached_by_mtime
+    async def compute(path):
+        calls.append(path)
+        if len(calls) == 1:
+            raise RuntimeError("first call fails")
+        return "ok"
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await compute(pdf_path)
+        return await compute(pdf_path)
+
+    assert asyncio.run(run()) == "ok"
+    assert len(calls) == 2
+
+
+def test_cancelled_caller_does_not_cancel_shared_work(tmp_path):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    calls = []
+
+    @cached_by_mtime
+    async def compute(path):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(compute(pdf_path))
+        second = asyncio.ensure_future(compute(pdf_path))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
+    assert len(calls) == 1
+
+
+def test_least_recently_used_result_is_evicted(tmp_path):
+    paths = [make_pdf(tmp_path / f"{i}.pdf") for i in range(3)]
+    calls = []
+
+    @cached_by_mtime(maxsize=2)
+    async def compute(path):
+        calls.append(path)
+        return path
+
+    async def run():
+        await compute(paths[0])
+        await compute(paths[1])
+        await compute(paths[0])
+        # Evicts paths[1], the least recently used
+        await compute(paths[2])
+        await compute(paths[0])
+        await compute(paths[1])
+
+    asyncio.run(run())
+    assert calls == [paths[0], paths[1], paths[2], paths[1]]
+
+
+def test_eviction_keeps_in_flight_result(tmp_path):
+    path_a = make_pdf(tmp_path / "a.pdf")
+    path_b = make_pdf(tmp_path / "b.pdf")
+    release = None
+    calls = []
+
+    @cached_by_mtime(maxsize=1)
+    async def compute(path):
+        calls.append(path)
+        if path == path_a:
+            await release.wait()
+        return path
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        pending = asyncio.ensure_future(compute(path_a))
+        await asyncio.sleep(0)
+        # Evicts the entry for path_a while its computation is running
+        assert await compute(path_b) == path_b
+        release.set()
+        assert await pending == path_a
+        assert await compute(path_a) == path_a
+
+    asyncio.run(run())
+    assert calls == [path_a, path_b, path_a]
+
+
+# PDFCache
+
+def test_evicted_document_is_closed(tmp_path, small_pdf_cache):
+    paths = [make_pdf(tmp_path / f"{i}.pdf") for i in range(3)]
+
+    async def run():
+        docs = [await PDFProcessor.get_pdf_document(path) for path in paths]
+        await flush_mupdf_thread()
+        return docs
+
+    docs = asyncio.run(run())
+    assert len(small_pdf_cache) == 2
+    assert paths[0] not in small_pdf_cache
+    assert docs[0].is_closed
+    assert not docs[1].is_closed and not docs[2].is_closed
+
+
+def test_stale_document_is_reopened(tmp_path, small_pdf_cache):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+
+    async def run():
+        old_doc = await PDFProcessor.get_pdf_document(pdf_path)
+        assert await PDFProcessor.get_pdf_document(pdf_path) is old_doc
+        touch(pdf_path)
+        new_doc = await PDFProcessor.get_pdf_document(pdf_path)
+        await flush_mupdf_thread()
+        return old_doc, new_doc
+
+    old_doc, new_doc = asyncio.run(run())
+    assert new_doc is not old_doc
+    assert old_doc.is_closed
+    assert not new_doc.is_closed
+
+
+def test_concurrent_first_requests_open_once(tmp_path, small_pdf_cache, monkeypatch):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    opens = []
+    open_pdf = PDFProcessor._open_pdf
+
+    def counting_open(path):
+        opens.append(path)
+        return open_pdf(path)
+
+    monkeypatch.setattr(PDFProcessor, "_open_pdf", staticmethod(counting_open))
+
+    async def run():
+        return await asyncio.gather(*(PDFProcessor.get_cached_pdf(pdf_path) for _ in range(5)))
+
+    entries = asyncio.run(run())
+    assert opens == [pdf_path]
+    assert all(entry is entries[0] for entry in entries)
+    assert entries[0].basename == "a.pdf"
+
+
+def test_failed_open_drops_lock(tmp_path, small_pdf_cache):
+    missing = str(tmp_path / "missing.pdf")
+
+    async def run():
+        with pytest.raises(FileNotFoundError):
+            await PDFProcessor.get_cached_pdf(missing)
+
+    asyncio.run(run())
+    assert missing not in small_pdf_cache
+    assert missing not in small_pdf_cache._locks
+
+
+# Page-at-a-time text
+
+def test_iter_raw_text_yields_each_page(tmp_path, small_pdf_cache):
+    pdf_path = make_pdf(tmp_path / "a.pdf", pages=3)
+
+    async def run():
+        pages = [(page_idx, text) async for page_idx, text in PDFProcessor.iter_raw_text(pdf_path)]
+        return pages, await PDFProcessor.extract_raw_text(pdf_path)
+
+    pages, full_text = asyncio.run(run())
+    assert [page_idx for page_idx, _ in pages] == [0, 1, 2]
+    assert [text.strip() for _, text in pages] == ["Page 0 text", "Page 1 text", "Page 2 text"]
+    assert "\n\n".join(text for _, text in pages).strip() == full_text
+
+
+def test_iter_raw_text_stops_when_file_shrinks(tmp_path, small_pdf_cache):
+    pdf_path = make_pdf(tmp_path / "a.pdf", pages=10)
+
+    async def run():
+        page_indices = []
+        async for page_idx, _ in PDFProcessor.iter_raw_text(pdf_path):
+            page_indices.append(page_idx)
+            if page_idx == 1:
+                # Rewrite with fewer pages; later lookups reopen the file
+                make_pdf(pdf_path, pages=3)
+                touch(pdf_path)
+        return page_indices
+
+    assert asyncio.run(run()) == [0, 1, 2]
+
+
+# Documents closed while a caller is in flight
+
+async def keep_invalidating(pdf_path, task):
+    """Change the file and look it up again until task finishes, so the
+    cached document is closed and reopened under it"""
+    while not task.done():
+        touch(pdf_path)
+        await PDFProcessor.get_pdf_document(pdf_path)
+        await asyncio.sleep(0.001)
+    return await task
+
+
+def test_academic_text_survives_reopen_mid_gather(tmp_path, small_pdf_cache):
+    pdf_path = make_pdf(tmp_path / "a.pdf", pages=30)
+
+    async def run():
+        task = asyncio.ensure_future(AcademicTextProcessor.extract_academic_text(pdf_path))
+        return await keep_invalidating(pdf_path, task)
+
+    result = asyncio.run(run())
+    assert result["total_pages"] == 30
+    assert [p["page_number"] for p in result["pages"]] == list(range(30))
+
+
+def test_iter_raw_text_survives_reopen_between_pages(tmp_path, small_pdf_cache):
+    pdf_path = make_pdf(tmp_path / "a.pdf", pages=30)
+
+    async def collect():
+        return [(page_idx, text) async for page_idx, text in PDFProcessor.iter_raw_text(pdf_path)]
+
+    async def run():
+        return await keep_invalidating(pdf_path, asyncio.ensure_future(collect()))
+
+    pages = asyncio.run(run())
+    assert [page_idx for page_idx, _ in pages] == list(range(30))
+    assert pages[7][1].strip() == "Page 7 text"
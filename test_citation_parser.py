@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests that citation and reference parsing behaves like the original per-pattern code
+"""
+import os
+import random
+import re
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+
+from academic_pdf_reader_mcp.academic.citation_parser import CitationParser
+
+
+# The in-text citation patterns as first written, each scanned separately
+ORIGINAL_IN_TEXT_PATTERNS = [
+    r'\(([A-Z][a-z]+ et al\.?, \d{4}[a-z]?)\)',
+    r'\(([A-Z][a-z]+ & [A-Z][a-z]+, \d{4}[a-z]?)\)',
+    r'\(([A-Z][a-z]+, \d{4}[a-z]?)\)',
+    r'\[(\d+)\]',
+    r'\[(\d+)-(\d+)\]',
+    r'\[(\d+,\s*\d+(?:,\s*\d+)*)\]',
+]
+
+
+def original_citation_type(citation):
+    if re.match(r'\[\d+\]', citation):
+        return "numbered"
+    elif re.match(r'\([A-Z]', citation):
+        return "author_year"
+    else:
+        return "other"
+
+
+def original_find_in_text_citations(text):
+    """_find_in_text_citations as first written, one finditer per pattern"""
+    citations = []
+    for pattern in ORIGINAL_IN_TEXT_PATTERNS:
+        for match in re.finditer(pattern, text):
+            citation_text = match.group(0)
+            position = match.start()
+            context_start = max(0, position - 50)
+            context_end = min(len(text), position + len(citation_text) + 50)
+            citations.append({
+                "citation": citation_text,
+                "position": position,
+                "context": text[context_start:context_end],
+                "type": original_citation_type(citation_text)
+            })
+
+    unique_citations = []
+    seen = set()
+    for citation in sorted(citations, key=lambda x: x["position"]):
+        if citation["citation"] not in seen:
+            unique_citations.append(citation)
+            seen.add(citation["citation"])
+    return unique_citations
+
+
+def original_parse_reference(ref_text, ref_number):
+    """_parse_reference as first written, one re.search per field"""
+    ref_text = ref_text.strip()
+
+    if len(ref_text) < 20:
+        return None
+
+    parsed = {
+        "reference_number": ref_number,
+        "raw_text": ref_text,
+        "authors": [],
+        "year": "",
+        "title": "",
+        "journal": "",
+        "volume": "",
+        "pages": ""
+    }
+
+    year_match = re.search(r'\((\d{4}[a-z]?)\)', ref_text)
+    if year_match:
+        parsed["year"] = year_match.group(1)
+
+    doi_match = re.search(r'doi[:\s]*(10\.\d+/[^\s]+)', ref_text, re.IGNORECASE)
+    if doi_match:
+        parsed["doi"] = doi_match.group(1)
+
+    url_match = re.search(r'https?://[^\s]+', ref_text)
+    if url_match:
+        parsed["url"] = url_match.group(0)
+
+    if year_match:
+        author_part = ref_text[:year_match.start()].strip()
+        author_part = re.sub(r'^\[\d+\]\s*', '', author_part)
+        author_part = re.sub(r'^\d+\.\s*', '', author_part)
+        parsed["authors_raw"] = author_part
+
+    return parsed
+
+
+REFERENCES = [
+    "Smith, J. (2020). A short title. Journal of Things, 5(2), 1-10.",
+    "[3] Smith, J., & Jones, K. (2019a). Title. Journal, 12, 100-120. doi:10.1000/xyz123",
+    "12. Jones, K. (1999). Old paper. DOI 10.1234/ab.c https://example.org/paper",
+    "[1] 2. Numbered twice (2001). Title https://example.org/a(2020)b",
+    "Author, A. Title without a year. https://doi.org/10.5555/abc doi: 10.5555/abc",
+    "No year here but doi:10.1/z and http://example.com",
+    "Too short (2020)",
+    "Reference with a url first https://x.org/(1998) and a year (2005)",
+]
+
+
+@pytest.mark.parametrize("ref_text", REFERENCES)
+def test_reference_fields_match_original_searches(ref_text):
+    assert CitationParser._parse_reference(ref_text, 4) == original_parse_reference(ref_text, 4)
+
+
+def test_generated_references_match_original_searches():
+    pieces = ["[1] ", "1. ", "Smith, J. ", "& Jones, K. ", "(2020)", "(2019a)", "(1999)",
+              "doi:10.1000/xyz", "DOI 10.1234/ab.c", "doi: 10.55/q(2020)", "https://x.org/a(2020)b",
+              "http://doi.org/10.1/z", "Title. ", "Journal, 5(2), 1-10.", " ", "text ", "10.5/nodoi "]
+    rng = random.Random(0)
+    for _ in range(20000):
+        ref_text = "".join(rng.choices(pieces, k=rng.randint(0, 9)))
+        assert CitationParser._parse_reference(ref_text, 4) == original_parse_reference(ref_text, 4), ref_text
+
+
+# In-text citations
+
+CITATION_TEXTS = [
+    "",
+    "No citations at all.",
+    "As shown (Smith et al., 2020) and (Smith & Jones, 2018), later (Smith, 2020a).",
+    "Numbered [1], ranges [1-3], lists [1, 2, 3] and [4,5], repeated [1] and [1-3].",
+    "Both styles (Jones, 2021) [2] (Jones, 2021) [2] (jones, 2021) [[7]] [8]-9]",
+    "x" * 80 + " (Smith et al, 2019b) " + "y" * 80,
+]
+
+
+@pytest.mark.parametrize("text", CITATION_TEXTS)
+def test_in_text_citations_match_original_scans(text):
+    assert CitationParser._find_in_text_citations(text) == original_find_in_text_citations(text)
+
+
+def test_generated_in_text_citations_match_original_scans():
+    pieces = ["(Smith et al., 2020)", "(Smith et al, 2019a)", "(Smith & Jones, 2018)", "(Smith, 2020)",
+              "(Jones, 2021b)", "[1]", "[12]", "[1-3]", "[1, 2, 3]", "[4,5]", "(", ")", "[", "]",
+              "Smith", " ", ", ", "2020", "et al.", "& ", "text", ".", "\n", "(smith, 2020)"]
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = "".join(rng.choices(pieces, k=rng.randint(0, 12)))
+        assert CitationParser._find_in_text_citations(text) == original_find_in_text_citations(text), text
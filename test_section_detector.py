@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests that section header matching behaves like the original per-pattern loop
+"""
+import itertools
+import os
+import random
+import re
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+
+from academic_pdf_reader_mcp.academic.section_detector import SectionDetector
+
+
+# The section patterns as first written, tried one by one with re.IGNORECASE
+ORIGINAL_SECTION_PATTERNS = {
+    "abstract": [
+        r"^ABSTRACT\s*$",
+        r"^Abstract\s*$",
+        r"^\d+\.\s*ABSTRACT",
+        r"^\d+\.\s*Abstract"
+    ],
+    "introduction": [
+        r"^INTRODUCTION\s*$",
+        r"^Introduction\s*$",
+        r"^\d+\.\s*INTRODUCTION",
+        r"^\d+\.\s*Introduction",
+        r"^1\.\s*Introduction"
+    ],
+    "methods": [
+        r"^METHODS?\s*$",
+        r"^Methods?\s*$",
+        r"^METHODOLOGY\s*$",
+        r"^Methodology\s*$",
+        r"^\d+\.\s*METHODS?",
+        r"^\d+\.\s*Methods?",
+        r"^\d+\.\s*METHODOLOGY",
+        r"^\d+\.\s*Methodology"
+    ],
+    "results": [
+        r"^RESULTS?\s*$",
+        r"^Results?\s*$",
+        r"^FINDINGS\s*$",
+        r"^Findings\s*$",
+        r"^\d+\.\s*RESULTS?",
+        r"^\d+\.\s*Results?",
+        r"^\d+\.\s*FINDINGS",
+        r"^\d+\.\s*Findings"
+    ],
+    "discussion": [
+        r"^DISCUSSION\s*$",
+        r"^Discussion\s*$",
+        r"^\d+\.\s*DISCUSSION",
+        r"^\d+\.\s*Discussion"
+    ],
+    "conclusion": [
+        r"^CONCLUSION\s*$",
+        r"^Conclusion\s*$",
+        r"^CONCLUSIONS\s*$",
+        r"^Conclusions\s*$",
+        r"^\d+\.\s*CONCLUSION",
+        r"^\d+\.\s*Conclusion",
+        r"^\d+\.\s*CONCLUSIONS",
+        r"^\d+\.\s*Conclusions"
+    ],
+    "references": [
+        r"^REFERENCES\s*$",
+        r"^References\s*$",
+        r"^BIBLIOGRAPHY\s*$",
+        r"^Bibliography\s*$",
+        r"^\d+\.\s*REFERENCES",
+        r"^\d+\.\s*References"
+    ]
+}
+
+
+def original_match(line):
+    for section_name, patterns in ORIGINAL_SECTION_PATTERNS.items():
+        for pattern in patterns:
+            if re.match(pattern, line, re.IGNORECASE):
+                return section_name
+    return None
+
+
+HEADER_LINES = [
+    "Abstract", "ABSTRACT", "abstract", "aBsTrAcT", "Abstract:", "Abstracts",
+    "Introduction", "1. Introduction", "1.Introduction", "2. INTRODUCTION", "1 Introduction",
+    "Method", "Methods", "METHODOLOGY", "3. Methods and Materials", "3.2 Methods",
+    "Result", "Results", "Findings", "4. Results and Analysis", "4. Findings",
+    "Discussion", "5. Discussion of the Results",
+    "Conclusion", "Conclusions", "CONCLUSIONS", "6. Conclusions and Future Work",
+    "References", "REFERENCES", "Bibliography", "7. References", "7. Bibliography",
+    # Numbered headers longer than the unnumbered-header length limit
+    "3. Methods for the Experimental Setup and Evaluation Protocol",
+    "4. Results of the Large-Scale Evaluation on Three Benchmark Datasets",
+    # Body text that mentions section names
+    "The results are shown in Table 2.", "Introduction to the problem",
+    "In the discussion below we compare both methods.", "12. As noted, the references",
+    "",
+]
+
+
+@pytest.mark.parametrize("line", HEADER_LINES)
+def test_header_matches_original_patterns(line):
+    assert SectionDetector._match_section_pattern(line) == original_match(line)
+
+
+def test_generated_lines_match_original_patterns():
+    words = ["Abstract", "INTRODUCTION", "introduction", "Methods", "Method", "METHODOLOGY",
+             "Results", "Findings", "Discussion", "Conclusion", "Conclusions", "References",
+             "Bibliography", "bibliography", "Experimental", "Setup", "and", "the", "Work"]
+    numbers = ["", "1.", "2. ", "3.2 ", "10.", "1 ", "12.  ", "1.1. "]
+    endings = ["", " ", ".", ":", "s"]
+    rng = random.Random(0)
+    for _ in range(20000):
+        line = (rng.choice(numbers) + " ".join(rng.choices(words, k=rng.randint(1, 6)))
+                + rng.choice(endings)).strip()
+        assert SectionDetector._match_section_pattern(line) == original_match(line), line
+
+
+def test_every_single_word_header_matches_original_patterns():
+    for word, number in itertools.product(
+        ["abstract", "introduction", "method", "methods", "methodology", "result", "results",
+         "findings", "discussion", "conclusion", "conclusions", "references", "bibliography"],
+        ["", "1. ", "2."],
+    ):
+        for line in (number + word, number + word.upper(), number + word.title()):
+            assert SectionDetector._match_section_pattern(line) == original_match(line), line
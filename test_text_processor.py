@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests that academic text cleanup and sentence splitting behave like the original regex code
+"""
+import os
+import random
+import re
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import pytest
+
+from academic_pdf_reader_mcp.academic.text_processor import AcademicTextProcessor
+
+
+def original_clean(text):
+    """_clean_academic_text as first written, one re.sub per fix"""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = re.sub(r'(\w)-\s+(\w)', r'\1\2', text)
+    text = re.sub(r'\s+([.,;:])', r'\1', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    return text.strip()
+
+
+CLEAN_SAMPLES = [
+    "",
+    "   ",
+    "Plain sentence.",
+    "wordsRunTogether inCamelCase",
+    "a hyphen-\nated word and a line-   break",
+    "space before , punctuation ; here : and .",
+    "multiple   spaces\n\nand\tnewlines\n \n",
+    "endOf-\nLine mixedWith -\n dangling hyphen .",
+    "Numbers 1-\n2 and under_-\nscores",
+    "aB-\ncD ,e",
+]
+
+
+@pytest.mark.parametrize("text", CLEAN_SAMPLES)
+def test_clean_matches_original_chain(text):
+    assert AcademicTextProcessor._clean_academic_text(text) == original_clean(text)
+
+
+def test_generated_text_cleans_like_original_chain():
+    alphabet = ["a", "b", "B", "C", "-", ".", ",", ";", ":", " ", " ", "\n", "\t", "1", "_", "é", "É"]
+    rng = random.Random(0)
+    for _ in range(50000):
+        text = "".join(rng.choices(alphabet, k=rng.randint(0, 14)))
+        assert AcademicTextProcessor._clean_academic_text(text) == original_clean(text), repr(text)
+
+
+# Sentence splitting
+
+@pytest.mark.parametrize("text", [
+    "", "One sentence", "One. Two! Three? Four", "Trailing space. ", "Ellipsis... then more.  Done.",
+    "Abbrev. e.g. stays split.\nNew line? Yes!\tTab",
+])
+def test_sentences_match_original_split(text):
+    assert list(AcademicTextProcessor._iter_sentences(text)) == re.split(r'(?<=[.!?])\s+', text)
+
+
+def test_generated_sentences_match_original_split():
+    rng = random.Random(0)
+    for _ in range(50000):
+        text = "".join(rng.choices("ab.!? \n\t", k=rng.randint(0, 12)))
+        assert list(AcademicTextProcessor._iter_sentences(text)) == re.split(r'(?<=[.!?])\s+', text), repr(text)